@@ -0,0 +1,690 @@
+# Load general packages
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+import pickle
+import joblib
+from tqdm.notebook import tqdm
+
+# Load sklearn packages
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.linear_model import LogisticRegression
+import xgboost as xgb
+from xgboost import XGBClassifier
+from catboost import CatBoostClassifier
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn import set_config
+
+# Load visualization packages
+import matplotlib
+matplotlib.use("Agg", force=True)  # headless, non-interactive backend; no GUI event-loop hooks
+import seaborn as sns
+import matplotlib.pyplot as plt
+from matplotlib.pyplot import figure
+
+# Load specialized packages
+import shap
+from numba import njit, prange
+
+# Load Custom Modules
+from modules.utils import save_json, load_json, getparams
+from modules.exception import CustomException
+from modules.logger import logging
+
+# Set sklearn configuration
+set_config(transform_output="pandas")  # Set SHAP output format to pandas DataFrame for easier manipulation
+plt.rcParams['text.usetex'] = False
+
+# Tree ensembles that shap.TreeExplainer can explain exactly from the tree structure
+TREE_MODEL_TYPES = (XGBClassifier, CatBoostClassifier, RandomForestClassifier,
+                    GradientBoostingClassifier, DecisionTreeClassifier)
+# Linear models that shap.LinearExplainer explains exactly from the coefficients
+LINEAR_MODEL_TYPES = (LogisticRegression,)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _abs_mean_3d(a):
+    """
+    Mean absolute value per feature of a (samples, features, classes) array in one fused pass,
+    parallelised over features.
+    """
+    n, f, c = a.shape
+    out = np.zeros(f, dtype=np.float32)
+    for j in prange(f):
+        s = 0.0
+        for i in range(n):
+            for k in range(c):
+                s += abs(a[i, j, k])
+        out[j] = s / (n * c)
+    return out
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _abs_mean_2d(a):
+    """
+    Mean absolute value per feature of a (samples, features) array, parallelised over features.
+    """
+    n, f = a.shape
+    out = np.zeros(f, dtype=np.float32)
+    for j in prange(f):
+        s = 0.0
+        for i in range(n):
+            s += abs(a[i, j])
+        out[j] = s / n
+    return out
+
+
+def _mean_abs_shap(shap_v):
+    """
+    Global importance (mean |SHAP|) per feature for single-output or multi-class SHAP values.
+    """
+    # Numba kernels have no float16 support, so reduced-precision values are widened first
+    if shap_v.dtype not in (np.float32, np.float64):
+        shap_v = shap_v.astype(np.float32)
+    if shap_v.ndim == 3:
+        return _abs_mean_3d(shap_v)
+    return _abs_mean_2d(shap_v)
+
+
+# SHAP plotting functions that draw a single class panel on the current axes
+PANEL_PLOTS = {
+    "waterfall": shap.plots.waterfall,
+    "summary": shap.summary_plot,
+    "heatmap": shap.plots.heatmap,
+    "bar": shap.plots.bar,
+}
+
+
+class SHAP_Analysis:
+    """
+    This class is responsible for performing SHAP analysis and creating various visualization plots.
+
+    Attributes:
+    -----------
+    X : pd.DataFrame
+        The feature matrix used for model training and SHAP analysis.
+    y : pd.Series or np.array
+        The target labels corresponding to the feature matrix X.
+    outdir : str
+        The directory where output plots and files will be saved.
+    random_samples : dict
+        A dictionary containing random sample indices for different classes.
+    biomarker_type : str
+        The type of biomarker being analyzed (e.g., microRNA, gene, metabolite).
+    shap_values : np.array
+        The SHAP values computed for the feature matrix X.
+    fitted_model : XGBClassifier
+        The trained model used to generate SHAP values.
+    scoring : str
+        The scoring metric used for model evaluation. Options include "f1", "recall", "precision", "accuracy".
+    feature_map_reverse : dict
+        A mapping of feature names to their original names.
+    model_finetune : bool
+        Indicates whether to fine-tune the model.
+    fine_tune_cv_nfolds : int
+        The number of folds to use for cross-validation during model fine-tuning.
+    top_features_to_plot : int 
+        The number of features to display on plots
+    background_size : int
+        The number of background rows given to model-agnostic explainers.
+    explain_size : int
+        The maximum number of rows whose SHAP values are computed.
+    shap_dtype : str
+        The dtype SHAP values are stored in after computation.
+    formats : tuple of str
+        The file formats each plot is saved in.
+
+    Methods:
+    --------
+    shapWaterFall():
+        Plots a waterfall plot for both control and disease samples side by side.
+    
+    shapForce():
+        Plots force plots for two random samples from different classes.
+    
+    shapSummary():
+        Creates and saves a SHAP summary plot.
+    
+    shapHeatmap():
+        Creates and saves a SHAP heatmap plot.
+    
+    shapFeatureImportance():
+        Computes and returns the top differentiating features based on SHAP values.
+    """
+
+    def __init__(self, 
+                 X=None, 
+                 y=None, 
+                 outdir: str = "shap", 
+                 random_samples: dict = None,
+                 feature_type: str = "microRNA",
+                 feature_map_reverse:dict = None,
+                 model_finetune:bool = False,
+                 fine_tune_cv_nfolds:int = 5,
+                 scoring:str = "f1",
+                 top_features_to_plot:int = 20,
+                 trained_models_info:dict = None,
+                 class_names: list = None,
+                 preprocessor: object = None,
+                 background_size: int = 100,
+                 explain_size: int = 500,
+                 shap_dtype: str = "float32",
+                 formats: tuple = ("png", "pdf")
+                ):
+
+        """
+        Initializes the SHAP_Analysis object with the provided parameters.
+
+        Parameters:
+        -----------
+        X : pd.DataFrame, optional
+            The feature matrix used for model training and SHAP analysis.
+        y : pd.Series or np.array, optional
+            The target labels corresponding to the feature matrix X.
+        outdir : str, optional
+            The directory where output plots and files will be saved. Default is "shap".
+        random_samples : dict, optional
+            A dictionary containing random sample indices for different classes.
+        feature_type : str, optional
+            The type of feature being analyzed (e.g., microRNA, gene, metabolite). Default is "microRNA".
+        feature_map_reverse : dict, optional
+            A mapping of feature names to their original names.
+        model_finetune : bool, optional
+            Indicates whether to fine-tune the model. Default is False.
+        fine_tune_cv_nfolds : int, optional
+            The number of folds to use for cross-validation during model fine-tuning. Default is 5.
+        scoring : str, optional
+            The scoring metric used for model evaluation. Options include "f1", "recall", "precision", "accuracy". Default is "f1".
+        top_features_to_plot : int, optional
+            The number of features to display per plot.
+        background_size : int, optional
+            The number of background rows sampled for model-agnostic explainers. Default is 100.
+        explain_size : int, optional
+            The maximum number of rows to explain; the random samples are always included. Default is 500.
+        shap_dtype : str, optional
+            The dtype SHAP values are cast to after computation ("float32", "float16", or None to keep
+            the explainer output). Default is "float32".
+        formats : tuple of str, optional
+            The file formats each plot is saved in, each under its own {outdir}/{ext} directory. The first
+            format is the path printed for the caller. Default is ("png", "pdf"); pass ("png",) to skip PDFs.
+        """
+        self.X = X
+        self.y = y
+        self.random_samples = random_samples
+        self.outdir = outdir
+        self.feature_type = feature_type
+        self.feature_map_reverse = feature_map_reverse
+        self.model_finetune =  model_finetune
+        self.fine_tune_cv_nfolds = fine_tune_cv_nfolds
+        self.scoring = scoring
+        self.top_features_to_plot = top_features_to_plot
+        self.trained_models_info = trained_models_info
+        self.class_names = class_names
+        self.preprocessor = preprocessor
+        self.background_size = background_size
+        self.explain_size = explain_size
+        self.shap_dtype = shap_dtype
+        self.formats = tuple(formats)
+        self._X_processed = None
+        self._X_processed_np = None
+        self._fig = None
+
+        # Original feature names for display, resolved once and reused by fit() and every plot/importance method
+        names_map = self.feature_map_reverse or {}
+        self._display_names = [names_map.get(f, f) for f in self.X.columns] if X is not None else []
+        self._feature_names_display = np.array(self._display_names, dtype=object)
+
+    def fit(self):
+        """
+        Fit the model and compute SHAP values with a tree, linear or model-agnostic explainer.
+        """
+        if self.trained_models_info:
+            model_key = list(self.trained_models_info.keys())[0]
+            logging.info(f"Using pre-trained model for SHAP Analysis: {model_key}")
+            self.fitted_model = self.trained_models_info[model_key]['model']
+        else:
+            raise ValueError("SHAP analysis requires a pre-trained classification model, but none was provided.")
+        
+        if self.preprocessor is None:
+            raise ValueError("SHAP analysis in V2 pipeline requires a 'preprocessor' object, but none was provided.")
+
+        # Transform once per instance; repeated fit() calls reuse the processed matrix
+        if self._X_processed is None:
+            self._X_processed = self.preprocessor.transform(self.X)
+            self._X_processed_np = np.ascontiguousarray(np.asarray(self._X_processed), dtype=np.float32)
+        X_processed_background = self._X_processed
+        logging.info(f"Initializing SHAP Explainer for {model_key} using processed data")
+
+        # Only explain a subsample of rows (always including the random samples used by the
+        # per-sample plots); the plots summarise the top features so this keeps them representative
+        explain_idx = self._explain_indices(X_processed_background.shape[0])
+        X_processed_explain = self._take_rows(X_processed_background, explain_idx)
+        self.X_explained = self.X.iloc[explain_idx]
+        row_to_position = {row: position for position, row in enumerate(explain_idx)}
+        self.sample_positions = {name: row_to_position[index] for name, index in (self.random_samples or {}).items()}
+
+        # Reuse SHAP values computed earlier for the same model and data
+        cache_path = self._cache_path(X_processed_background, explain_idx)
+        self.shap_values = None
+        if os.path.exists(cache_path):
+            try:
+                self.shap_values = joblib.load(cache_path)
+                logging.info(f"Loaded cached SHAP values from {cache_path}")
+            except Exception:
+                self.shap_values = None
+        if self.shap_values is None:
+            self.shap_values = self._compute_shap_values(X_processed_explain, explain_idx, model_key)
+            self._downcast_shap_values()
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                joblib.dump(self.shap_values, cache_path, compress=3)
+            except Exception:
+                # Do not fail the analysis due to cache write issues
+                pass
+
+        # Keep the (potentially large) value array on disk; plots only page in the slices they use
+        self._memmap_shap_values(os.path.splitext(cache_path)[0] + ".values.npy")
+
+        self.shap_values.feature_names = self._display_names
+
+        # Class lookups shared by the per-class plot methods
+        self._class_to_idx = {name: i for i, name in enumerate(self.class_names or [])}
+        self._is_multiclass = len(self.shap_values.shape) > 2 and self.shap_values.shape[2] > 1
+
+    def _compute_shap_values(self, X_processed_explain, explain_idx, model_key):
+        """
+        Builds the explainer matching the model type and computes SHAP values for the explained rows
+        in one batched call; per-sample plots slice the returned Explanation. Tree models that
+        TreeExplainer cannot handle fall back to the model-agnostic explainer.
+        """
+        if self._is_tree_model(self.fitted_model):
+            shap_values = None
+            if isinstance(self.fitted_model, XGBClassifier):
+                shap_values = self._xgboost_contributions(X_processed_explain)
+            if shap_values is None:
+                # TreeSHAP uses the cover statistics stored in the trees, so no background scan is needed
+                logging.info(f"Using TreeExplainer fast path for {model_key}")
+                try:
+                    explainer = shap.TreeExplainer(self.fitted_model, feature_perturbation="tree_path_dependent")
+                    shap_values = explainer(X_processed_explain, check_additivity=False)
+                except Exception as e:
+                    # Some tree models are not supported by TreeExplainer (e.g. multi-class gradient boosting)
+                    logging.info(f"TreeExplainer failed for {model_key}, falling back to model-agnostic explainer: {e}")
+                    shap_values = None
+            if shap_values is not None:
+                return shap_values
+        return self._model_agnostic_shap_values(explain_idx, model_key)
+
+    def _model_agnostic_shap_values(self, explain_idx, model_key):
+        """
+        Computes SHAP values for the explained rows with the linear explainer for linear models and the
+        model-agnostic explainer on the prediction function otherwise.
+        """
+        # Model-agnostic explainers scale with |background| x |explained|, so use a small background.
+        # Plain float32 arrays avoid pandas indexing overhead inside SHAP's evaluation loops
+        background = shap.sample(self._X_processed_np, self.background_size, random_state=0)
+        X_processed_explain = self._X_processed_np[explain_idx]
+        # Pick the explainer from the model interface upfront, rather than paying for a failed
+        # explainer construction before falling back to the prediction function
+        if isinstance(self.fitted_model, LINEAR_MODEL_TYPES):
+            explainer = shap.LinearExplainer(self.fitted_model, background)
+        elif hasattr(self.fitted_model, 'predict_proba'):
+            explainer = shap.Explainer(self.fitted_model.predict_proba, background)
+        elif hasattr(self.fitted_model, 'predict'):
+            explainer = shap.Explainer(self.fitted_model.predict, background)
+        else:
+            raise ValueError(f"Model {model_key} exposes neither predict_proba nor predict and cannot be explained.")
+        shap_values = explainer(X_processed_explain)
+        return shap_values
+
+    @staticmethod
+    def _take_rows(X, indices):
+        """
+        Selects rows by position from a DataFrame or an ndarray.
+        """
+        if hasattr(X, "iloc"):
+            return X.iloc[indices]
+        return X[indices]
+
+    def _downcast_shap_values(self):
+        """
+        Casts the values, base values and data of the SHAP explanation to self.shap_dtype.
+        """
+        if self.shap_dtype is None:
+            return
+        for attr in ("values", "base_values", "data"):
+            array = getattr(self.shap_values, attr, None)
+            if isinstance(array, np.ndarray) and np.issubdtype(array.dtype, np.floating):
+                setattr(self.shap_values, attr, array.astype(self.shap_dtype, copy=False))
+
+    def _memmap_shap_values(self, values_path):
+        """
+        Backs the SHAP value array with a read-only memory map of values_path (.npy), so the OS only pages
+        in the slices each plot touches. The file is written atomically, and only when it is missing or its
+        shape/dtype differ, so cache hits reuse it. Keeps the in-memory array if the file cannot be used.
+        """
+        values = getattr(self.shap_values, "values", None)
+        if not isinstance(values, np.ndarray):
+            return
+        try:
+            stored = np.load(values_path, mmap_mode='r') if os.path.exists(values_path) else None
+            if stored is None or stored.shape != values.shape or stored.dtype != values.dtype:
+                os.makedirs(os.path.dirname(values_path), exist_ok=True)
+                tmp_path = f"{values_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, values)
+                os.replace(tmp_path, values_path)
+                stored = np.load(values_path, mmap_mode='r')
+            # Plain ndarray view of the mapping: Explanation slicing misbehaves on np.memmap subclasses
+            self.shap_values.values = np.asarray(stored)
+        except Exception:
+            pass
+
+    def _cache_path(self, X_processed_background, explain_idx):
+        """
+        Returns the on-disk cache path for SHAP values, keyed by (model_hash, data_hash). The data hash
+        also covers the settings that change the stored values (background/explain sizes, dtype).
+        """
+        model_hash = hashlib.blake2b(pickle.dumps(self.fitted_model)).hexdigest()[:16]
+        data_hash = joblib.hash((X_processed_background, explain_idx, self.background_size,
+                                 self.explain_size, self.shap_dtype))
+        return os.path.join(self.outdir, "cache", f"{model_hash}_{data_hash}.pkl")
+
+    def _explain_indices(self, n_rows):
+        """
+        Returns the sorted row indices to explain: every row when there are at most explain_size rows,
+        otherwise a seeded random subsample of explain_size rows plus the random samples.
+        """
+        if n_rows <= self.explain_size:
+            return np.arange(n_rows)
+        rng = np.random.default_rng(0)
+        sampled = rng.choice(n_rows, self.explain_size, replace=False)
+        required = [int(index) for index in (self.random_samples or {}).values()]
+        return np.array(sorted(set(sampled.tolist()) | set(required)))
+
+    def _xgboost_contributions(self, X_processed):
+        """
+        Computes TreeSHAP values with XGBoost's native predictor (pred_contribs), on the GPU when
+        CUDA is available. Returns None on failure so the caller can fall back to shap.TreeExplainer.
+        """
+        booster = self.fitted_model.get_booster()
+        try:
+            booster.set_param({"device": "cuda"})
+            contribs = booster.predict(xgb.DMatrix(X_processed), pred_contribs=True)
+        except Exception as e:
+            logging.info(f"XGBoost native SHAP unavailable, falling back to TreeExplainer: {e}")
+            return None
+        finally:
+            booster.set_param({"device": "cpu"})
+
+        if contribs.ndim == 3:
+            # Multi-class output is (samples, classes, features + 1); SHAP expects classes last
+            values = np.transpose(contribs[:, :, :-1], (0, 2, 1))
+            base_values = contribs[:, :, -1]
+        else:
+            values = contribs[:, :-1]
+            base_values = contribs[:, -1]
+
+        data = X_processed.to_numpy() if hasattr(X_processed, "to_numpy") else np.asarray(X_processed)
+        return shap.Explanation(values=values, base_values=base_values, data=data,
+                                feature_names=list(getattr(X_processed, "columns", [])) or None)
+
+    @staticmethod
+    def _is_tree_model(model):
+        """
+        Returns True if the model is a tree ensemble supported by shap.TreeExplainer.
+        """
+        return isinstance(model, TREE_MODEL_TYPES) or hasattr(model, "get_booster")
+
+    def _check_fit(self):
+        """
+        Checks if the model is fitted and the SHAP explainer is initialized.
+        If not, it calls the fit method to train the model.
+        """
+        if not hasattr(self, 'shap_values') or self.shap_values is None: # Ensure SHAP values are computed before plotting
+            logging.info("Training Model for SHAP Analysis")
+            self.fit()
+            
+    def _slice(self, sample=slice(None), cls_name=None):
+        """
+        Returns the SHAP explanation for the given sample(s), restricted to the output of cls_name when
+        the explanation is multi-class (falling back to the first output for unknown class names).
+        """
+        if self._is_multiclass:
+            return self.shap_values[sample, :, self._class_to_idx.get(cls_name, 0)]
+        return self.shap_values[sample]
+
+    def _save_plot(self, name, fig=None):
+        """
+        Save a figure once per requested format to {outdir}/{ext}/{name}.{ext}, close it and print the
+        path of the first saved file. Without fig, the current pyplot figure (drawn by shap) is saved.
+        """
+        if fig is None:
+            fig = plt.gcf()
+        plot_paths = [f'{self.outdir}/{ext}/{name}.{ext}' for ext in self.formats]
+        for plot_path in plot_paths:
+            fig.savefig(plot_path, bbox_inches='tight')
+        # The shared figure is kept for the next plot and released in close()
+        if fig is not self._fig:
+            plt.close(fig)
+        print(plot_paths[0])
+
+    def _figure(self, figsize=None, dpi=None):
+        """
+        Returns the figure shared by all plot methods, cleared, resized and made current so shap's
+        pyplot-based plotting draws onto it. Reusing one figure keeps a single Agg canvas buffer alive
+        instead of allocating a new one per plot.
+        """
+        figsize = figsize or plt.rcParams['figure.figsize']
+        dpi = dpi or plt.rcParams['figure.dpi']
+        if self._fig is None or not plt.fignum_exists(self._fig.number):
+            self._fig = plt.figure(figsize=figsize, dpi=dpi)
+        else:
+            plt.figure(self._fig.number)
+            self._fig.clear()
+            self._fig.set_size_inches(figsize)
+            self._fig.set_dpi(dpi)
+        return self._fig
+
+    def close(self):
+        """
+        Releases the shared plotting figure.
+        """
+        if self._fig is not None:
+            plt.close(self._fig)
+            self._fig = None
+
+    def _render_panels(self, panels, nrows, ncols, figsize):
+        """
+        Draw the per-class panels directly on the axes of the shared figure laid out as nrows x ncols,
+        so the saved files keep shap's vector output.
+        """
+        fig = self._figure(figsize)
+        axes = fig.subplots(nrows, ncols)
+        for ax, (plot_name, shap_slice, title, title_fontsize, plot_kwargs) in zip(np.ravel(axes), panels):
+            # shap's plotting functions draw on the current axes
+            plt.sca(ax)
+            PANEL_PLOTS[plot_name](shap_slice, show=False, **plot_kwargs)
+            ax.set_title(title, fontsize=title_fontsize)
+        fig.tight_layout(pad=1.0)
+        return fig
+
+    def _multiclass_render(self, plot_name, out_name, title, title_fontsize=15, plot_kwargs=None,
+                           figsize=(20, 10), orientation='h'):
+        """
+        Render one panel per class from the (samples, features, classes) SHAP values and save them as a
+        single figure, side-by-side (orientation='h') or stacked (orientation='v').
+
+        Parameters:
+        -----------
+        plot_name : str
+            Key of the SHAP plotting function in PANEL_PLOTS.
+        out_name : str
+            File name (without extension) of the saved figure.
+        title : str
+            Panel title template, formatted with the class name.
+        """
+        n_classes = self.shap_values.shape[2]
+        panels = [(plot_name, self._slice(cls_name=self.class_names[i]), title.format(self.class_names[i]),
+                   title_fontsize, plot_kwargs or {}) for i in range(n_classes)]
+        nrows, ncols = (1, n_classes) if orientation == 'h' else (n_classes, 1)
+        fig = self._render_panels(panels, nrows=nrows, ncols=ncols, figsize=figsize)
+        self._save_plot(out_name, fig)
+
+    def shapWaterFall(self):
+        self._check_fit()
+        logging.info("Plotting Waterfall Plots")
+        
+        class_names = list(self.random_samples.keys())
+        class_name_1, class_name_2 = class_names[0], class_names[1]
+
+        # Select the explanation of each class sample (for that class, if the output is multi-class)
+        panels = []
+        for class_name in (class_name_1, class_name_2):
+            shap_values_for_plot = self._slice(self.sample_positions[class_name], class_name)
+            panels.append(("waterfall", shap_values_for_plot, f"{class_name} Sample", 15,
+                           {"max_display": self.top_features_to_plot}))
+
+        # Render both samples and place them side-by-side
+        fig = self._render_panels(panels, nrows=1, ncols=2, figsize=(20, 10))
+        fig.suptitle(f"Waterfall Plots for {class_name_1} and {class_name_2} Samples", fontsize=20, y=1.02)
+        
+        logging.info("Saving Plots")
+        self._save_plot(f'shap_waterfall_subplots_{class_name_1}_and_{class_name_2}', fig)
+
+    def shapForce(self):
+        self._check_fit()
+        class_names = list(self.random_samples.keys())
+        # create a new plot for each class
+        for i in range(len(class_names)):
+
+            # Select the specific explanation for the current sample and class
+            shap_values_for_plot = self._slice(self.sample_positions[class_names[i]], class_names[i])
+
+            shap.force_plot(shap_values_for_plot, matplotlib=True, show=False)
+            # Move title to figure-level to avoid overlapping with plot content
+            fig = plt.gcf()
+            fig.suptitle(f'SHAP Force Plot for a random {class_names[i]} sample', fontsize=20)
+            # Reserve space on top for the suptitle
+            plt.tight_layout(rect=[0, 0, 1, 0.95])
+            self._save_plot(f'forceplot_for_{class_names[i]}_sample')
+            #plt.show()
+    
+    def shapForcePlot(self):
+        self._check_fit()
+        class_names = list(self.random_samples.keys())
+        # create a new plot for each class
+        for i in range(len(class_names)):
+
+            # Select the specific explanation for the current sample and class
+            shap_values_for_plot = self._slice(self.sample_positions[class_names[i]], class_names[i])
+
+            # Pass figsize and move title to figure-level to prevent overlap
+            shap.force_plot(shap_values_for_plot, matplotlib=True, show=False, figsize=(20, 5))
+            fig = plt.gcf()
+            fig.suptitle(f'SHAP Force Plot for a random {class_names[i]} sample', fontsize=16)
+            # Leave space at the top for the suptitle
+            plt.tight_layout(rect=[0, 0, 1, 0.94])
+
+            self._save_plot(f'forceplot_for_{class_names[i]}_sample')
+    
+    def shapSummary(self):
+        """
+        Plot a SHAP summary plot. For multi-class outputs, it plots for each class side-by-side.
+        """
+        self._check_fit()
+        logging.info("Plotting SHAP Summary Plot")
+
+        # Handle multi-class models by creating subplots
+        if self._is_multiclass:
+            self._multiclass_render("summary", 'shap_summary_plot_subplots', "SHAP Summary for {}",
+                                    plot_kwargs={"features": self.X_explained})
+        else:
+            # This handles single-output models
+            self._figure()
+            shap.summary_plot(self.shap_values, self.X_explained, show=False)
+            plt.title("SHAP Summary Plot")
+            self._save_plot('shap_summary_plot_overall')
+
+    def shapHeatmap(self):
+        """
+        Create and save a SHAP heatmap plot. For multi-class, creates a vertical subplot per class.
+        """
+        self._check_fit()
+        logging.info("Plotting SHAP Heatmap")
+
+        # Handle multi-class models by creating vertical subplots (one per class)
+        if self._is_multiclass:
+            self._multiclass_render("heatmap", 'shap_heatmap_subplots', "SHAP Heatmap for {}", title_fontsize=20,
+                                    plot_kwargs={"max_display": self.top_features_to_plot, "plot_width": 20},
+                                    figsize=(20, 40), orientation='v')
+        else:
+            # Handle single-output models
+            self._figure((18, 40), dpi=300)
+            shap.plots.heatmap(self.shap_values, max_display=self.top_features_to_plot, show=False, plot_width=20)
+            plt.title(f"SHAP Heatmap of Top Differentiating {self.feature_type}s", fontsize=25, loc='center', pad=20)
+            plt.xlabel('Instances', fontsize=20); plt.xticks(fontsize=18); plt.yticks(fontsize=18)
+            self._save_plot('shap_heatmap_plot_overall')
+
+    def meanSHAP(self):
+        """
+        Create and save a mean SHAP plot (bar plot). For multi-class, creates a side-by-side plot per class.
+        """
+        self._check_fit()
+        logging.info("Plotting Mean SHAP Plot")
+
+        if self._is_multiclass:
+            self._multiclass_render("bar", 'mean_shap_plot_subplots', "Mean SHAP for {}",
+                                    plot_kwargs={"max_display": self.top_features_to_plot})
+
+            # Additionally, create a single global bar using mean(|SHAP|) aggregated across classes
+            try:
+                shap_v = self.shap_values.values if hasattr(self.shap_values, 'values') else self.shap_values
+                # Aggregate: mean over samples of mean absolute SHAP over classes
+                global_importance = _mean_abs_shap(shap_v)
+                # Map feature names back
+                feature_names = self._feature_names_display
+                importance_df = pd.DataFrame({
+                    'feature': feature_names,
+                    'importance': global_importance
+                }).sort_values('importance', ascending=False).head(self.top_features_to_plot)
+
+                fig = self._figure((8, 6), dpi=300)
+                ax = fig.add_subplot(111)
+                ax.barh(importance_df['feature'][::-1], importance_df['importance'][::-1])
+                ax.set_title(f"Global Mean |SHAP| of Top Differentiating {self.feature_type}s", fontsize=20, loc='center', pad=20)
+                ax.set_xlabel('mean(|SHAP value|)', fontsize=20); ax.tick_params(labelsize=18)
+                self._save_plot('mean_shap_plot_overall', fig)
+            except Exception as _:
+                # Fail silently to avoid interrupting pipeline
+                pass
+        else:
+            self._figure((8, 6), dpi=300)
+            shap.plots.bar(self.shap_values, max_display=self.top_features_to_plot, show=False)
+            plt.title(f"Mean SHAP Plot of Top Differentiating {self.feature_type}s", fontsize=20, loc='center', pad=20)
+            plt.xlabel('mean(|SHAP value|)', fontsize=20); plt.xticks(fontsize=18); plt.yticks(fontsize=18)
+            self._save_plot('mean_shap_plot_overall')
+
+    def shapFeatureImportance(self):
+        """
+        Compute and return the top differentiating features based on SHAP values.
+        For multi-class models, it aggregates importances across all classes.
+        """
+        self._check_fit()
+        logging.info("Computing SHAP Feature Importances")
+
+        shap_v = self.shap_values.values if hasattr(self.shap_values, 'values') else self.shap_values
+        
+        # Average the absolute SHAP values over samples (and classes, for multi-class outputs)
+        # to get a single global importance value for each feature.
+        shap_importance_values = _mean_abs_shap(shap_v)
+
+        # Sort features by descending importance without building an intermediate DataFrame
+        order = np.argsort(-shap_importance_values, kind="stable")
+        feature_names = self._feature_names_display[order]
+        top_features = dict(zip(feature_names.tolist(), shap_importance_values[order].tolist()))
+
+        return top_features
\ No newline at end of file
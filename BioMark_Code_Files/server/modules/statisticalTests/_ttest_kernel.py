@@ -0,0 +1,66 @@
+# Load general packages
+import numpy as np
+from numba import njit, prange
+
+# Stats
+from scipy.stats import t as t_distribution
+
+
+# error_model="numpy": constant columns give inf/nan like SciPy instead of raising ZeroDivisionError
+# nogil=True: lets the t-test overlap the ANOVA thread in StatisticalTestAnalysis.run_all_analyses
+@njit(parallel=True, nogil=True, cache=True, error_model="numpy")
+def _pooled_t_statistic(X, mask_0, mask_1):
+    """
+    Equal-variance two-sample t-statistic for every column of X, computed in parallel over columns
+    with float64 accumulators (two passes per class: mean, then sum of squared deviations).
+    """
+    n_features = X.shape[1]
+    n_0 = mask_0.sum()
+    n_1 = mask_1.sum()
+    t_statistic = np.empty(n_features, dtype=np.float64)
+    for j in prange(n_features):
+        sum_0 = 0.0
+        sum_1 = 0.0
+        for i in range(X.shape[0]):
+            if mask_0[i]:
+                sum_0 += X[i, j]
+            elif mask_1[i]:
+                sum_1 += X[i, j]
+        mean_0 = sum_0 / n_0
+        mean_1 = sum_1 / n_1
+
+        ss_0 = 0.0
+        ss_1 = 0.0
+        for i in range(X.shape[0]):
+            if mask_0[i]:
+                ss_0 += (X[i, j] - mean_0) ** 2
+            elif mask_1[i]:
+                ss_1 += (X[i, j] - mean_1) ** 2
+        pooled_variance = (ss_0 + ss_1) / (n_0 + n_1 - 2)
+        t_statistic[j] = (mean_0 - mean_1) / np.sqrt(pooled_variance * (1.0 / n_0 + 1.0 / n_1))
+    return t_statistic
+
+
+def ttest_two_class(X, mask_0, mask_1):
+    """
+    Two-sided equal-variance t-test between the rows selected by mask_0 and mask_1, for every
+    column of X. Matches scipy.stats.ttest_ind(X[mask_0], X[mask_1], axis=0).
+
+    Parameters:
+    -----------
+    X : np.ndarray
+        2-D feature matrix (samples x features).
+    mask_0, mask_1 : np.ndarray
+        Boolean row masks of the two classes.
+
+    Returns:
+    --------
+    tuple of (np.ndarray, np.ndarray, int)
+        The t-statistics, the two-sided p-values and the degrees of freedom.
+    """
+    mask_0 = np.ascontiguousarray(mask_0, dtype=np.bool_)
+    mask_1 = np.ascontiguousarray(mask_1, dtype=np.bool_)
+    t_statistic = _pooled_t_statistic(X, mask_0, mask_1)
+    df = int(mask_0.sum() + mask_1.sum() - 2)
+    p_values = 2 * t_distribution.sf(np.abs(t_statistic), df)
+    return t_statistic, p_values, df
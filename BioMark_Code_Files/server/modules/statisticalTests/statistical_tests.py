@@ -0,0 +1,399 @@
+# Load general packages
+import pandas as pd
+import numpy as np
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# Sklearn
+from sklearn import set_config
+
+# Visualization
+import matplotlib
+matplotlib.use("Agg")  # headless backend; plots are only written to files
+import seaborn as sns
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Stats
+from scipy.stats import f as f_distribution
+
+# Custom
+from modules.logger import logging
+from modules.feature_selection import feature_rank
+from modules.statisticalTests._ttest_kernel import ttest_two_class
+
+
+set_config(transform_output="pandas")
+
+
+def _write_csv(df, path):
+    """
+    Writes a result table as a ';'-separated, UTF-8 (with BOM) CSV using pyarrow's multi-threaded
+    C++ writer. The BOM keeps the file Excel-friendly, as with pandas' encoding='utf-8-sig'.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with open(path, "wb") as f:
+        f.write(b"\xef\xbb\xbf")
+        pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(delimiter=';', quoting_style="needed"))
+
+
+def _json_default(obj):
+    """
+    json.dump fallback that converts NumPy scalars and arrays to the equivalent Python values.
+    """
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _anova_f_oneway(X, y):
+    """
+    One-way ANOVA F-statistic and p-value for every column of X (same formula as sklearn's
+    f_classif), computed from per-class sums on class-sorted rows without sklearn's input checks.
+    """
+    order = np.argsort(y, kind="stable")
+    X_sorted = X[order]
+    _, class_starts, class_counts = np.unique(y[order], return_index=True, return_counts=True)
+    n_samples, n_classes = len(y), len(class_counts)
+
+    # Accumulate in float64 so float32 inputs do not lose precision in the sums of squares
+    class_sums = np.add.reduceat(X_sorted, class_starts, axis=0, dtype=np.float64)
+    class_sq_sums = np.add.reduceat(np.square(X_sorted, dtype=np.float64), class_starts, axis=0)
+    total_sum = class_sums.sum(axis=0)
+    correction = total_sum ** 2 / n_samples
+
+    ss_total = class_sq_sums.sum(axis=0) - correction
+    ss_between = (class_sums ** 2 / class_counts[:, None]).sum(axis=0) - correction
+    ss_within = ss_total - ss_between
+    df_between, df_within = n_classes - 1, n_samples - n_classes
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_statistic = (ss_between / df_between) / (ss_within / df_within)
+    p_values = f_distribution.sf(f_statistic, df_between, df_within)
+    return f_statistic, p_values
+
+
+class StatisticalTestAnalysis:
+    """
+    Statistical tests runner for ANOVA and t-Test. Prepares data the same way as the
+    previous DifferentiatingFactorAnalysis and saves results to feature_importances.json
+    grouped by class pairs for downstream use (e.g., feature ranking summary).
+    """
+
+    def __init__(self,
+                 data=None,
+                 analyses=None,
+                 labels_column: str = "Diagnosis",
+                 reference_class: str = "Control",
+                 sample_id_column: str = "Sample ID",
+                 outdir: str = "output",
+                 feature_type: str = "microRNA",
+                 top_features_to_plot: int = 20):
+
+        sns.set_theme(style="darkgrid")
+        self.data = data
+
+        # Prepare X matrix with categorical preprocessing
+        X_temp = data.drop([labels_column, sample_id_column], axis=1)
+
+        # Classify every column in a single pass over the dtypes
+        categorical_columns, numerical_columns = [], []
+        for col, dtype in X_temp.dtypes.items():
+            if dtype == object or isinstance(dtype, pd.CategoricalDtype):
+                categorical_columns.append(col)
+            elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                numerical_columns.append(col)
+
+        # The tests are memory-bound reductions; float32 halves the bytes moved per pass
+        if numerical_columns:
+            X_temp = X_temp.astype({col: np.float32 for col in numerical_columns}, copy=False)
+
+        self.categorical_encoding_info = {}
+        if categorical_columns:
+            dummies = pd.get_dummies(
+                X_temp[categorical_columns],
+                columns=categorical_columns,
+                prefix=categorical_columns,
+                drop_first=False,
+                dummy_na=False,
+                # Same dtype as the numerical columns, so the float32 matrix below needs no cast
+                dtype=np.float32
+            )
+            # Store mapping info for frontend/logging
+            for col in categorical_columns:
+                generated_cols = [c for c in dummies.columns if c.startswith(f"{col}_")]
+                self.categorical_encoding_info[col] = {
+                    'generated_columns': list(generated_cols),
+                    'encoding_type': 'OneHot'
+                }
+            X_temp = pd.concat([X_temp.drop(columns=categorical_columns), dummies], axis=1)
+
+        self.X = X_temp
+        # Encode labels once as a categorical: integer codes (sorted like LabelEncoder) replace
+        # repeated string comparisons when splitting samples by class
+        self._label_cat = data[labels_column].astype('category')
+        self.y = self._label_cat.cat.codes.to_numpy(np.int32)
+        # Dense float32 matrix (dummies included) and original feature names, shared by every analysis
+        # (indexed by position)
+        self._X_np = self.X.to_numpy(dtype=np.float32, copy=False)
+        self._feature_names = self.X.columns.to_numpy()
+        self.labels = data[labels_column]
+        # Class codes and names in order of first appearance (missing labels have code -1)
+        self._class_codes = [code for code in pd.unique(self.y) if code >= 0]
+        self.class_names = [self._label_cat.cat.categories[code] for code in self._class_codes]
+        # Boolean row mask per class (same order as class_names), reused by every analysis
+        self._class_masks = np.stack([self.y == code for code in self._class_codes])
+        self.label_encodings = {int(code): name for code, name in zip(self._class_codes, self.class_names)}
+        self.reference_class = reference_class
+        self.outdir = outdir
+        self.feature_type = feature_type
+        self.top_features_to_plot = top_features_to_plot
+        self.analyses = analyses or ["anova", "t_test"]
+
+        # Seed and random sample indices (kept for compatibility/logs if needed later)
+        np.random.seed(42)
+
+        self.top_features = {}
+        # Each analysis thread draws on its own reusable figure; top_features writes are serialised
+        self._plot_local = threading.local()
+        self._top_features_lock = threading.Lock()
+
+    def _bar_axes(self):
+        """
+        Returns the cleared axes of the calling thread's bar-plot figure, creating it on first use.
+        """
+        if getattr(self._plot_local, "fig", None) is None:
+            self._plot_local.fig = Figure(figsize=(10, 15))
+            FigureCanvasAgg(self._plot_local.fig)
+            self._plot_local.ax = self._plot_local.fig.add_subplot(111)
+        else:
+            self._plot_local.ax.clear()
+        return self._plot_local.ax
+
+    def _save_figure(self, analysis, name):
+        """
+        Saves the calling thread's figure as PNG and PDF under {outdir}/{analysis}/. The tight bounding box is
+        computed once and reused for both formats instead of re-deriving it per savefig call.
+        """
+        fig = self._plot_local.fig
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.1)
+        # Output directories are created only for analyses that actually save plots
+        for ext in ("png", "pdf"):
+            os.makedirs(os.path.join(self.outdir, analysis, ext), exist_ok=True)
+        png_path = f'{self.outdir}/{analysis}/png/{name}.png'
+        fig.savefig(png_path, bbox_inches=bbox)
+        fig.savefig(f'{self.outdir}/{analysis}/pdf/{name}.pdf', bbox_inches=bbox)
+        print(png_path)
+
+    def perform_anova(self):
+        logging.info("Performing ANOVA Analysis")
+        length = 110
+        print("=" * length)
+        print(" Starting ANOVA")
+        print("=" * length)
+
+        f_statistic, p_values = _anova_f_oneway(self._X_np, self.y)
+
+        logging.info("Computing ANOVA Features")
+        # Full table ordered by descending F-value (NaN last) via one argsort on the numeric column
+        order = np.argsort(-f_statistic, kind="stable")
+        significant_features = pd.DataFrame({
+            "Features": self._feature_names[order],
+            "F-value": f_statistic[order],
+            "p-value": p_values[order]
+        })
+
+        # Save full ANOVA table to CSV for download
+        try:
+            anova_csv_path = os.path.join(self.outdir, "anova", "anova_results.csv")
+            os.makedirs(os.path.dirname(anova_csv_path), exist_ok=True)
+            _write_csv(significant_features, anova_csv_path)
+        except Exception:
+            pass
+
+        logging.info("Plotting ANOVA Features")
+        # Only the 20 strongest significant features are plotted: select them in O(F) with argpartition
+        # and sort just those, rather than filtering the fully sorted table
+        f_significant = np.where(p_values < 0.05, f_statistic, -np.inf)
+        n_top = int(min(20, np.count_nonzero(p_values < 0.05)))
+        top_idx = np.argpartition(-f_significant, n_top - 1)[:n_top] if n_top else np.array([], dtype=np.intp)
+        top_idx = top_idx[np.argsort(-f_significant[top_idx], kind="stable")]
+        top_anova_features = pd.DataFrame({
+            "Features": self._feature_names[top_idx],
+            "F-value": f_statistic[top_idx]
+        })
+
+        ax = self._bar_axes()
+        ax.barh(top_anova_features['Features'], top_anova_features['F-value'], color="blue")
+        ax.set_xlabel('F-value', fontsize=20)
+        ax.tick_params(labelsize=18)
+        ax.set_title(f'ANOVA Feature Importance of Top Differentiating {self.feature_type}s', fontsize=20, loc='center', pad=15)
+        ax.invert_yaxis()
+
+        logging.info("Saving Plots")
+        self._save_figure("anova", "anova_features_plot")
+
+        # Rows are already sorted by F-value, so the dict keeps that order
+        anova_features = dict(zip(significant_features["Features"].tolist(),
+                                  significant_features["F-value"].to_numpy(dtype=np.float64).tolist()))
+        with self._top_features_lock:
+            self.top_features["anova"] = anova_features
+
+        print(list(anova_features)[:self.top_features_to_plot])
+        print("=" * length)
+        print(" ANOVA Analysis Completed ")
+        print("=" * length)
+
+    def perform_t_test(self):
+        logging.info("Performing T-TEST")
+        length = 110
+        print("=" * length)
+        print(" Starting t-Test")
+        print("=" * length)
+
+        np.random.seed(0)
+
+        # One parallel pass over all columns instead of a SciPy call per feature
+        t_statistic, p_values, df = ttest_two_class(self._X_np, self._class_masks[0], self._class_masks[1])
+
+        logging.info("Computing Feature Importance by Statistical Significance")
+        # Rank feature positions on the numeric statistic (NaN last) and gather every column,
+        # including the feature names, with one take instead of sorting an object-dtype frame
+        abs_statistic = np.abs(t_statistic)
+        feature_idx = np.argsort(-abs_statistic, kind="stable")
+        p_values_df = pd.DataFrame({
+            "Features": self._feature_names[feature_idx],
+            "statistic": t_statistic[feature_idx],
+            "pvalue": p_values[feature_idx],
+            "df": df,
+            "Abs(statistic)": abs_statistic[feature_idx],
+        })
+
+        # Save full t-test table to CSV for download
+        try:
+            ttest_csv_path = os.path.join(self.outdir, "t_test", "t_test_results.csv")
+            os.makedirs(os.path.dirname(ttest_csv_path), exist_ok=True)
+            _write_csv(p_values_df, ttest_csv_path)
+        except Exception:
+            pass
+
+        logging.info("Plotting Top n Features")
+        top_t_test_features = p_values_df[p_values_df.pvalue < 0.05].head(self.top_features_to_plot)
+
+        ax = self._bar_axes()
+        ax.barh(top_t_test_features['Features'], top_t_test_features['Abs(statistic)'], color="blue")
+        ax.set_xlabel('Abs(statistic)', fontsize=20)
+        ax.tick_params(labelsize=18)
+        ax.set_title(f't-Test Feature Importance of Top Differentiating {self.feature_type}s',
+                     fontsize=25, loc='center', pad=15)
+        ax.invert_yaxis()
+
+        logging.info("Saving Plots")
+        self._save_figure("t_test", "t_test_features_plot")
+
+        # Rows are already sorted by Abs(statistic), so the dict keeps that order
+        t_test_features = dict(zip(p_values_df["Features"].tolist(),
+                                   p_values_df["Abs(statistic)"].to_numpy(dtype=np.float64).tolist()))
+        with self._top_features_lock:
+            self.top_features["t_test"] = t_test_features
+
+        print(list(t_test_features)[:self.top_features_to_plot])
+        print("=" * length)
+        print(" t-Test Analysis Completed ")
+        print("=" * length)
+
+    def run_all_analyses(self):
+        logging.info("RUNNING STATISTICAL ANALYSES")
+        length = 110
+        print("=" * length)
+        print(" Starting Statistical Analyses ")
+        print("=" * length)
+
+        # The analyses only read X/y and write separate outputs, and their NumPy/SciPy work and the
+        # t-test kernel (compiled with nogil=True) release the GIL, so they run concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = []
+            if "anova" in self.analyses:
+                futures.append(executor.submit(self.perform_anova))
+            if "t_test" in self.analyses:
+                futures.append(executor.submit(self.perform_t_test))
+            for future in futures:
+                future.result()
+
+        logging.info("Saving Feature Importances")
+        # Save at base results/<file>/feature_importances.json (grouped by class pairs)
+        base_outdir = os.path.dirname(self.outdir)
+        json_path = os.path.join(base_outdir, "feature_importances.json")
+
+        # Load existing
+        if os.path.exists(json_path):
+            with open(json_path, "rb") as f:
+                raw = f.read()
+            try:
+                existing_data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                # Files written by the stdlib encoder may contain NaN tokens, which orjson rejects
+                try:
+                    existing_data = json.loads(raw)
+                except ValueError:
+                    existing_data = {}
+        else:
+            existing_data = {}
+
+        class_pair = f"{self.class_names[0]}_{self.class_names[1]}"
+        if class_pair not in existing_data:
+            existing_data[class_pair] = {}
+
+        for a in self.top_features.keys():
+            if a not in existing_data[class_pair]:
+                existing_data[class_pair][a] = {}
+            existing_data[class_pair][a].update(self.top_features[a])
+
+        # The stdlib encoder keeps the file's 4-space layout and writes NaN/inf (e.g. the statistic
+        # of a constant feature) as NaN tokens, which feature_rank reads back; orjson would write null
+        with open(json_path, "w") as f:
+            json.dump(existing_data, f, indent=4, default=_json_default)
+
+        # Generate aggregated ranking CSVs using ONLY current run outputs
+        # Structure: { class_pair: { analysis_name: {feature: score} } }
+        try:
+            filtered_for_ranking = {
+                class_pair: {a: self.top_features[a] for a in self.top_features.keys()}
+            }
+            label_analyses = "+".join(sorted(self.top_features.keys())) if hasattr(self, 'top_features') and self.top_features else ""
+            subdir = f"method=statistical_tests{',analysis=' + label_analyses if label_analyses else ''}"
+            feature_rank(
+                top_features=filtered_for_ranking,
+                num_top_features=self.top_features_to_plot,
+                feature_type=self.feature_type,
+                outdir=base_outdir,
+                subdir_label=subdir
+            )
+        except Exception:
+            pass
+
+        print("=" * length)
+        print(" Statistical Analyses Completed ")
+        print("=" * length)
+
+        # Write a concise README to clarify directory structure for this class pair
+        try:
+            readme_path = os.path.join(self.outdir, "README.md")
+            with open(readme_path, "w", encoding="utf-8") as rf:
+                rf.write(
+                    "# Analysis Outputs\n\n"
+                    "This folder contains statistical analysis outputs for the selected class pair.\n\n"
+                    "- feature_ranking/: aggregated ranking CSVs live under `../feature_ranking/<ClassA_ClassB>/ranked_features_df.csv`\n\n"
+                    "Notes:\n"
+                    "- Aggregated `feature_importances.json` is saved at the parent folder and grouped by model key.\n"
+                    "- The canonical ranked features CSV is only under `feature_ranking/<ClassA_ClassB>/`.\n"
+                )
+        except Exception:
+            pass
+
+
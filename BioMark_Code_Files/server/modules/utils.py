@@ -0,0 +1,939 @@
+import os
+import sys
+
+import numpy as np 
+import pandas as pd
+import seaborn as sns 
+import matplotlib
+matplotlib.use('Agg')  # headless: figures are only written to files
+import matplotlib.pyplot as plt
+from tqdm import tqdm
+import json
+import orjson
+import pickle
+import tempfile
+import csv
+import gzip
+import io
+import zipfile
+from pathlib import PurePath
+import joblib
+from joblib import Memory, Parallel, delayed
+
+from sklearn.metrics import roc_auc_score
+from sklearn.metrics import make_scorer
+from sklearn.model_selection import cross_validate
+from sklearn.model_selection import GridSearchCV, KFold, StratifiedKFold
+# Importing enable_halving_search_cv enables HalvingRandomSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
+from sklearn.metrics import classification_report
+
+
+from modules.exception import CustomException
+from modules.logger import logging
+
+# Save a Python object to a file using joblib (numpy buffers are written raw, not pickled)
+
+def save_object(file_path, obj):
+    try:
+        dir_path = os.path.dirname(file_path)
+
+        os.makedirs(dir_path, exist_ok=True)
+
+        joblib.dump(obj, file_path, protocol=pickle.HIGHEST_PROTOCOL)
+
+        logging.info(f"Saved Model object at '{file_path}'")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+    
+# Load a Python object saved by save_object (plain pickle files from older runs still load)
+
+def load_object(file_path):
+    try:
+        try:
+            obj = joblib.load(file_path)
+        except Exception:
+            with open(file_path, "rb") as file_obj:
+                obj = pickle.load(file_obj)
+
+        logging.info(f"Loaded object from '{file_path}'")
+        return obj
+
+    except Exception as e:
+        raise CustomException(e, sys)
+    
+
+# Load JSON data as a dictionary
+
+def load_json(json_path):
+    """
+    Load json data as a dictionary
+    """
+
+    try:
+        with open(json_path, "rb") as f:
+            file = f.read()
+        try:
+            json_data = orjson.loads(file)
+        except orjson.JSONDecodeError:
+            # Files written by the stdlib encoder may contain NaN tokens, which orjson rejects
+            json_data = json.loads(file)
+        logging.info(f"Loaded JSON data from '{json_path}'")
+    except Exception as e:
+        raise CustomException(e, sys)
+
+    return json_data
+
+# Save a dictionary or object as a JSON file
+
+def save_json(file_path, obj):
+    try:
+        dir_path = os.path.dirname(file_path)
+
+        os.makedirs(dir_path, exist_ok=True)
+
+        json_object = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+        with open(file_path, "wb") as file_obj:
+            file_obj.write(json_object)
+        logging.info(f"Saved JSON data at '{file_path}'")
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+# Metrics reported for cross validation
+CV_METRICS = ('f1', 'precision', 'recall', 'roc_auc', "accuracy")
+
+# Build the hyperparameter search used for fine tuning
+
+def search_strategy():
+    """
+    Hyperparameter search strategy, chosen with the SEARCH environment variable:
+        "halving" (default): HalvingRandomSearchCV (successive halving over n_samples), which
+                             discards weak candidates on small subsets before full-size fits
+        "grid": exhaustive GridSearchCV over the full grid (previous behaviour)
+    """
+    return os.environ.get('SEARCH', 'halving').lower()
+
+def _halving_fits(cv, y):
+    """
+    Whether successive halving can run on labels y: its smallest resource is
+    2 * n_splits * n_classes samples, which must not exceed the number of samples.
+    """
+    if y is None:
+        return True
+    if isinstance(cv, int):
+        n_splits = cv
+    elif hasattr(cv, 'get_n_splits'):
+        n_splits = cv.get_n_splits()
+    else:
+        n_splits = len(cv)  # precomputed (train, test) index pairs
+    return 2 * n_splits * len(np.unique(y)) <= len(y)
+
+def make_search(estimator, param_grid, cv, scoring, refit=True, n_jobs=-1, y=None):
+    """
+    Build the hyperparameter search for a model (see search_strategy). A dict of scorers
+    (multi-metric, with refit naming the selection metric) is only supported by the grid search.
+    Given the training labels y, training sets too small for successive halving use the grid
+    search. Candidate fits run in joblib worker processes (n_jobs), so nothing is pre-fitted in the
+    parent: none of the models JIT-compiles, and a warm-up there would not reach the workers.
+    """
+    if search_strategy() == 'grid' or not _halving_fits(cv, y):
+        return GridSearchCV(estimator,
+                            param_grid,
+                            cv=cv,
+                            scoring=scoring,
+                            refit=refit,
+                            n_jobs=n_jobs,
+                            error_score=np.nan)
+    return HalvingRandomSearchCV(estimator,
+                                 param_grid,
+                                 cv=cv,
+                                 scoring=scoring,
+                                 refit=refit,
+                                 n_jobs=n_jobs,
+                                 factor=3,
+                                 resource='n_samples',
+                                 random_state=42,
+                                 error_score=np.nan)
+
+# Build the cross validation report of the best candidate from a multi-metric grid search
+
+def search_cross_validation_scores(search, n_splits):
+    """
+    Same layout as get_cross_validation_scores, read from search.cv_results_ at best_index_
+    instead of refitting the chosen model once per fold.
+    """
+    results = search.cv_results_
+    best = search.best_index_
+    return {metric: {"mean": results[f"mean_test_{metric}"][best],
+                     "std": results[f"std_test_{metric}"][best],
+                     "all": [results[f"split{k}_test_{metric}"][best] for k in range(n_splits)]}
+            for metric in CV_METRICS}
+
+# Draw a stratified subsample of row indices
+
+def _stratified_subsample(y, frac, rng):
+    """
+    Return the indices of a stratified random subsample holding `frac` of every class
+    (at least one row per class). Classes are grouped with a single stable argsort and
+    bincount instead of one mask per class; the indices are returned in row order.
+    """
+    y_int, _ = pd.factorize(y)
+    counts = np.bincount(y_int)
+    order = np.argsort(y_int, kind='stable')
+    offsets = np.concatenate(([0], counts.cumsum()))
+    parts = []
+    for c in range(len(counts)):
+        members = order[offsets[c]:offsets[c + 1]]
+        rng.shuffle(members)
+        parts.append(members[:max(1, int(counts[c] * frac))])
+    return np.sort(np.concatenate(parts))
+
+# Tree-based models that train on float32 features (sklearn trees cast to float32 internally,
+# XGBoost bins float32 directly); other models keep the caller's dtype
+FLOAT32_MODELS = {"random forest", "decision tree", "gradient boosting", "xgbclassifier", "adaboost classifier"}
+
+def _as_float32(X):
+    """
+    Return a float32 copy of a float64 feature matrix (DataFrame columns and index are kept);
+    matrices of any other dtype, or DataFrames with non-float64 columns, are returned unchanged.
+    """
+    if hasattr(X, 'dtypes'):
+        if len(X.columns) and (X.dtypes == np.float64).all():
+            return X.astype(np.float32)
+        return X
+    X_arr = np.asarray(X)
+    return X_arr.astype(np.float32) if X_arr.dtype == np.float64 else X
+
+# Labels as a compact numpy array
+
+def _as_label_array(y):
+    """
+    Return labels as a contiguous numpy array; integer label codes (binary 0/1 here) are
+    downcast to int8 when they fit, other label types are returned unchanged.
+    """
+    y_arr = np.ascontiguousarray(pd.Series(y).to_numpy())
+    if np.issubdtype(y_arr.dtype, np.integer) and y_arr.size and y_arr.min() >= -128 and y_arr.max() <= 127:
+        return y_arr.astype(np.int8, copy=False)
+    return y_arr
+
+# Write a small table as a ';'-separated CSV
+
+def _write_semicolon_csv(path, header, rows):
+    """
+    Write a few-row table as a ';'-separated, UTF-8 (with BOM) CSV, formatted like
+    DataFrame.to_csv(index=False, sep=';'): floats in repr form, NaN as an empty field.
+    """
+    def _cell(value):
+        if isinstance(value, (float, np.floating)):
+            return '' if np.isnan(value) else repr(float(value))
+        return str(value)
+
+    lines = [';'.join(header)]
+    lines.extend(';'.join(_cell(value) for value in row) for row in rows)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('\n'.join(lines) + '\n')
+
+# Predict labels and ROC-AUC scores for a fitted classifier
+
+def _predict_with_scores(m, X):
+    """
+    Return (labels, scores). For probabilistic classifiers predict() is classes_[argmax(proba)],
+    so one predict_proba pass gives both; SVC(probability=True) predicts from its decision
+    function rather than its Platt-scaled probabilities, so it keeps a separate predict().
+    Scores are the positive-class probability (binary), the probability matrix (multi-class),
+    the decision function, or the labels as a last resort.
+    """
+    if hasattr(m, "predict_proba") and not getattr(m, "probability", False) and hasattr(m, "classes_"):
+        try:
+            proba = m.predict_proba(X)
+        except Exception:
+            proba = None
+        if isinstance(proba, np.ndarray) and proba.ndim == 2:
+            y_pred = np.asarray(m.classes_)[np.argmax(proba, axis=1)]
+            return y_pred, (proba[:, 1] if proba.shape[1] == 2 else proba)
+
+    y_pred = m.predict(X)
+    try:
+        if hasattr(m, "predict_proba"):
+            proba = m.predict_proba(X)
+            # binary -> return positive class prob; multi-class -> return full matrix
+            if isinstance(proba, np.ndarray) and proba.ndim == 2 and proba.shape[1] == 2:
+                return y_pred, proba[:, 1]
+            return y_pred, proba
+        if hasattr(m, "decision_function"):
+            return y_pred, m.decision_function(X)
+    except Exception:
+        pass
+    # fallback: use label predictions (poorer AUC)
+    return y_pred, y_pred
+
+# Tune, fit and score one model (run in a joblib worker by evaluate_models)
+
+def _evaluate_model(model_name, model, para, X_fit, X_eval, y_train_np, y_test_np, kfold, splits, search_n_jobs,
+                    param_finetune, n_folds, finetune_fraction, verbose, outdir, scoring,
+                    X_train_raw, preprocessor, pipeline_memory):
+    """
+    Evaluate a single model for evaluate_models. Runs in a separate process, so nothing is
+    printed or mutated here: the fitted model, its report entry, its best params (None
+    without fine tuning) and the stdout lines are returned for the parent to publish.
+    """
+    output = []
+    length = 110
+    logging.info(f"Training {model_name} model")
+    if verbose:
+        output.append("=" * length)
+        output.append(f" Starting {model_name} Model Training and Evaluation")
+        output.append("=" * length)
+    # reuse_search: the search was fit on exactly (X_train, y_train), so its refit is the final model
+    # fuse_cv: an exhaustive multi-metric grid also scored the chosen candidate on the same folds
+    reuse_search = False
+    fuse_cv = False
+    model_best_params = None
+    if param_finetune:
+        logging.info(f"Fine tunning {model_name} model")
+        # Prefer raw X and an unfitted preprocessor to avoid leakage
+        use_pipeline_cv = (preprocessor is not None) and (X_train_raw is not None)
+
+        # Build CV data (stratified subsample if requested)
+        if use_pipeline_cv:
+            X_source = X_train_raw
+            y_source = y_train_np
+            if finetune_fraction < 1.0:
+                idx_train = _stratified_subsample(y_source, finetune_fraction, np.random.default_rng(32))
+                # X_source is expected to be DataFrame; fall back to iloc if available, else array indexing
+                if hasattr(X_source, 'iloc'):
+                    X_train_cv = X_source.iloc[idx_train]
+                else:
+                    X_train_cv = X_source[idx_train]
+                y_train_cv = y_source[idx_train]
+            else:
+                X_train_cv = X_source
+                y_train_cv = y_source
+        else:
+            # Fallback to already transformed features (may introduce mild leakage)
+            if finetune_fraction < 1.0:
+                idx_train = _stratified_subsample(y_train_np, finetune_fraction, np.random.default_rng(32))
+                X_train_cv = X_fit.iloc[idx_train] if hasattr(X_fit, 'iloc') else np.asarray(X_fit)[idx_train]
+                y_train_cv = y_train_np[idx_train]
+            else:
+                # Keep X_train as is so a reused best estimator keeps its feature names
+                X_train_cv = X_fit
+                y_train_cv = y_train_np
+                reuse_search = True
+                fuse_cv = search_strategy() == 'grid' and isinstance(scoring, str)
+
+        # The precomputed folds index the full training set; a subsample is split by kfold itself
+        search_cv = splits if len(y_train_cv) == len(y_train_np) else kfold
+
+        # If we can, run GridSearch over a Pipeline to refit preprocessing per fold
+        if use_pipeline_cv:
+            try:
+                from sklearn.pipeline import Pipeline
+                from sklearn.base import clone
+                pipe = Pipeline([
+                    ('preprocess', clone(preprocessor)),
+                    ('model', model)
+                ], memory=pipeline_memory)
+                # Prefix grid keys with model__
+                if isinstance(para, list):
+                    para_prefixed = [{f"model__{k}": v for k, v in d.items()} for d in para]
+                else:
+                    para_prefixed = {f"model__{k}": v for k, v in para.items()}
+                # The pipeline refit would be on raw features, so only the best params are kept
+                gs = make_search(pipe, para_prefixed, cv=search_cv, scoring=scoring, refit=False, n_jobs=search_n_jobs, y=y_train_cv)
+                gs.fit(X_train_cv, y_train_cv)
+                # Strip model__ prefix for setting on the bare estimator
+                raw_best = gs.best_params_
+                model_best_params = { (k.split('model__',1)[1] if k.startswith('model__') else k): v for k, v in raw_best.items() }
+            except Exception as e:
+                # Fallback to legacy behavior if pipeline-based GS fails
+                gs = make_search(model, para, cv=search_cv, scoring=scoring, refit=False, n_jobs=search_n_jobs, y=y_train_cv)
+                gs.fit(X_train_cv, y_train_cv)
+                model_best_params = gs.best_params_
+        else:
+            if fuse_cv:
+                search_scoring = {metric: metric for metric in CV_METRICS}
+                search_scoring.setdefault(scoring, scoring)
+                gs = make_search(model, para, cv=search_cv, scoring=search_scoring, refit=scoring, n_jobs=search_n_jobs, y=y_train_cv)
+            else:
+                gs = make_search(model, para, cv=search_cv, scoring=scoring, refit=reuse_search, n_jobs=search_n_jobs, y=y_train_cv)
+            gs.fit(X_train_cv, y_train_cv)
+            model_best_params = gs.best_params_
+
+        if reuse_search:
+            model = gs.best_estimator_
+        else:
+            model.set_params(**model_best_params)
+    if not reuse_search:
+        model.fit(X_fit,y_train_np)
+
+    #get cross validation and test report
+    logging.info(f"Cross Validating {model_name} model")
+    if fuse_cv:
+        cross_val_report = search_cross_validation_scores(gs, n_folds)
+    else:
+        cross_val_report = get_cross_validation_scores(model, X_fit,y_train_np, cv= splits)
+    
+    # make predictions (labels and probability/score outputs for better ROC-AUC)
+    
+    y_train_pred, y_train_scores = _predict_with_scores(model, X_fit)  # prediction on train set
+    y_test_pred, y_test_scores = _predict_with_scores(model, X_eval)   # prediction on test set
+
+    logging.info(f"Testing {model_name} model")
+
+    train_report = get_test_report(y_train_np, y_train_pred, scores=y_train_scores)
+    test_report = get_test_report(y_test_np, y_test_pred, scores=y_test_scores)
+    report_entry = {"test_report":test_report, 
+                    "train_report":train_report, 
+                    "cross_val_report":cross_val_report}
+
+    # 
+    cv1 = cross_val_report["accuracy"]["mean"]
+    cv2 = cross_val_report["precision"]["mean"]
+    cv3 = cross_val_report["recall"]["mean"]
+    cv4 = cross_val_report["f1"]["mean"]
+    cv5 = cross_val_report["roc_auc"]["mean"]
+    cv6 = int(len(y_train_np)/n_folds)
+
+    # 
+    tr1 = train_report["accuracy"]
+    tr2 = train_report["precision"]
+    tr3 = train_report["recall"]
+    tr4 = train_report["f1"]
+    tr5 = train_report["roc_auc"]
+    tr6 = len(y_train_np)
+
+    # 
+    te1 = test_report["accuracy"]
+    te2 = test_report["precision"]
+    te3 = test_report["recall"]
+    te4 = test_report["f1"]
+    te5 = test_report["roc_auc"]
+    te6 = len(y_test_np)
+    
+    {'f1': 1.0, 'accuracy': 1.0, 'roc_auc': 1.0, 'precision': 1.0, 'recall': 1.0}
+    s = f"""              
+                            accuracy    precision    recall    f1-score    roc_auc    support\n   
+        cross validation    {cv1:.2f}        {cv2:.2f}         {cv3:.2f}      {cv4:.2f}        {cv5:.2f}       {cv6}
+        train set           {tr1:.2f}        {tr2:.2f}         {tr3:.2f}      {tr4:.2f}        {tr5:.2f}       {tr6}
+        test set            {te1:.2f}        {te2:.2f}         {te3:.2f}      {te4:.2f}        {te5:.2f}       {te6}\n
+        """
+    output.append(s)
+        
+    # Save model results as a table (if outdir is specified)
+    if outdir:
+        # Create model output directory
+        model_outdir = os.path.join(outdir, 'models', model_name)
+        os.makedirs(os.path.join(model_outdir, 'png'), exist_ok=True)
+        os.makedirs(os.path.join(model_outdir, 'pdf'), exist_ok=True)
+        
+        # Create table data
+        data = [
+            ['Cross Val', f"{cv1:.2f}", f"{cv2:.2f}", f"{cv3:.2f}", f"{cv4:.2f}", f"{cv5:.2f}", f"{cv6}"],
+            ['Train Set', f"{tr1:.2f}", f"{tr2:.2f}", f"{tr3:.2f}", f"{tr4:.2f}", f"{tr5:.2f}", f"{tr6}"],
+            ['Test Set', f"{te1:.2f}", f"{te2:.2f}", f"{te3:.2f}", f"{te4:.2f}", f"{te5:.2f}", f"{te6}"]
+        ]
+        
+        # Create table
+        fig, ax = plt.subplots(figsize=(12, 1), dpi=150)
+        ax.axis('off')
+        ax.axis('tight')
+        table = ax.table(cellText=data,
+                        colLabels=['', 'Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC', 'Support'],
+                        loc='center',
+                        cellLoc='center')
+        table.auto_set_font_size(False)
+        table.set_fontsize(16)
+        table.scale(1, 2.2)
+
+        # Add title
+        feature_status = "After Feature Selection" if "AfterFeatureSelection" in outdir else "Without Feature Selection"
+        fig.suptitle(f'Results for Model: {model_name} ({feature_status})', fontsize=18, y=2)
+        
+        # Save as PNG
+        png_path = os.path.join(model_outdir, 'png', f'{model_name}_results.png')
+        fig.savefig(png_path, bbox_inches='tight')
+        
+        # Save as PDF (single page, so the same figure is written directly)
+        fig.savefig(os.path.join(model_outdir, 'pdf', f'{model_name}_results.pdf'), bbox_inches='tight')
+        
+        plt.close(fig)
+        logging.info(f"Model results saved to {model_outdir} directory.")
+        
+        # Print file path to stdout (to be captured by Node.js)
+        relative_path = png_path.split('server/')[-1] if 'server/' in png_path else png_path
+        output.append(relative_path)
+
+    # --- Also save CSV exports for this model ---
+    try:
+        # 1) Summary table CSV (Cross Val / Train / Test)
+        _write_semicolon_csv(os.path.join(model_outdir, f'{model_name}_results.csv'),
+                             ['Split', 'Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC', 'Support'],
+                             data)
+
+        # 2) Per-fold CV scores CSV
+        cv_all = cross_val_report
+        folds = len(cv_all['accuracy']['all']) if isinstance(cv_all.get('accuracy', {}).get('all', []), list) else 0
+        if folds > 0:
+            _write_semicolon_csv(os.path.join(model_outdir, f'{model_name}_cv_folds.csv'),
+                                 ['Fold', 'Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC'],
+                                 zip(range(1, folds + 1),
+                                     cv_all['accuracy']['all'],
+                                     cv_all['precision']['all'],
+                                     cv_all['recall']['all'],
+                                     cv_all['f1']['all'],
+                                     cv_all['roc_auc']['all']))
+    except Exception:
+        # Do not fail evaluation due to CSV write issues
+        pass
+
+    return model, report_entry, model_best_params, output
+
+# Train and evaluate multiple models using cross-validation and test sets
+
+def evaluate_models(X_train, 
+                    y_train,
+                    X_test,
+                    y_test,
+                    models,
+                    param, 
+                    param_finetune = True, 
+                    n_folds = 10, 
+                    finetune_fraction = 1.0, 
+                    verbose:bool = True,
+                    outdir = None,
+                    scoring: str = "f1",
+                    X_train_raw = None,
+                    preprocessor = None
+                   ):
+    """
+    Train and evaluate multiple models using cross-validation and test sets.
+
+    Args:
+    X_train, y_train: Training features and labels.
+    X_test, y_test: Test features and labels.
+    models (dict): Dictionary of model names and model objects.
+    param (dict): Dictionary of hyperparameters for models.
+    param_finetune (bool): If True, perform hyperparameter tuning (see make_search for the strategy).
+    n_folds (int): Number of folds for cross-validation.
+    finetune_fraction (float): Fraction of training data used for hyperparameter tuning.
+    verbose (bool): If True, print training and evaluation details.
+    outdir (str): Output directory to save model evaluation results as tables.
+
+    Returns:
+    dict: Report containing cross-validation, training, and test performance for each model.
+
+    Raises:
+    CustomException: If any error occurs during model training or evaluation.
+    """
+    # Cache fitted preprocessing steps so pipeline search refits them once per fold, not per candidate.
+    # The cache is shared by every model of this call, so each fold's preprocessing is fitted once in
+    # total; X_train/X_test themselves arrive already transformed and are never re-preprocessed here.
+    pipeline_memory = Memory(location=os.path.join(outdir or tempfile.gettempdir(), 'sk_cache'), verbose=0)
+    try:
+        report = {}
+        best_params_by_model = {}
+
+        kfold = StratifiedKFold(n_splits=n_folds, random_state=42, shuffle = True)
+
+        if verbose:
+            length = 110
+            print("=" * length)
+            print(" Starting Model Training and Evaluation")
+            print("=" * length)
+
+        logging.info("Interating over Models")
+        # Case-insensitive lookup of hyperparameter grids by model name
+        param_lookup = {k.lower(): k for k in param.keys()}
+        # Coerce labels once for all models instead of per model and per use
+        y_train_np = _as_label_array(y_train)
+        y_test_np = _as_label_array(y_test)
+        # Split the training set once; every search and CV run (and every model) uses the same folds
+        splits = list(kfold.split(np.zeros(len(y_train_np)), y_train_np))
+        # float32 copies of the features for tree models, made on first use
+        X_train_f32 = X_test_f32 = None
+        tasks = []
+        for model_name, model in models.items():
+            if model_name.lower() in FLOAT32_MODELS:
+                if X_train_f32 is None:
+                    X_train_f32, X_test_f32 = _as_float32(X_train), _as_float32(X_test)
+                X_fit, X_eval = X_train_f32, X_test_f32
+            else:
+                X_fit, X_eval = X_train, X_test
+
+            para = None
+            if param_finetune:
+                # Match hyperparameter grid dict using case-insensitive key mapping
+                param_key = param_lookup.get(model_name.lower())
+                if param_key is None:
+                    raise CustomException(f"Hyperparameter grid not found for model '{model_name}'", sys)
+                para = param[param_key]
+            tasks.append((model_name, model, para, X_fit, X_eval))
+
+        # Models are independent: train them in parallel worker processes and split the
+        # cores between the model workers and each model's hyperparameter search
+        n_cpus = os.cpu_count() or 1
+        n_model_jobs = max(1, min(len(tasks), n_cpus))
+        search_n_jobs = max(1, n_cpus // n_model_jobs)
+        results = Parallel(n_jobs=n_model_jobs, backend='loky')(
+            delayed(_evaluate_model)(model_name, model, para, X_fit, X_eval, y_train_np, y_test_np,
+                                     kfold, splits, search_n_jobs, param_finetune, n_folds, finetune_fraction,
+                                     verbose, outdir, scoring, X_train_raw, preprocessor, pipeline_memory)
+            for model_name, model, para, X_fit, X_eval in tasks)
+
+        for (model_name, _, _, _, _), (fitted_model, report_entry, model_best_params, output) in zip(tasks, results):
+            # Workers fit copies: hand the fitted estimators back through the models dict, as callers read it from there
+            models[model_name] = fitted_model
+            report[model_name] = report_entry
+            if model_best_params is not None:
+                # keep best params for later reporting
+                best_params_by_model[model_name] = model_best_params
+            # Print the worker's output in model order (image paths are captured by Node.js)
+            for line in output:
+                print(line)
+                
+        if verbose:
+            print("=" * length)
+            print(f" Model Training and Evaluation Completed")
+            print("=" * length)
+                
+        # If we collected any best params, print a special line for the Node server to capture
+        try:
+            if best_params_by_model:
+                print("BEST_PARAMS:", json.dumps(best_params_by_model))
+        except Exception:
+            pass
+        return report
+
+    except Exception as e:
+        raise CustomException(e, sys)
+    finally:
+        pipeline_memory.clear(warn=False)
+    
+# Get cross validation scores for classification
+
+def get_cross_validation_scores(model, X, y, cv):
+    """
+    Get cross validation scores:
+        ('f1', 'precision', 'recall', 'roc_auc', "accuracy") for classification
+    cv may be a splitter or a precomputed list of (train_idx, test_idx) pairs.
+    """
+    try:
+        scores = cross_validate(model, X, y, cv=cv,scoring=CV_METRICS,return_train_score=False)
+        # Every entry has one value per fold: reduce them as one (entries x folds) matrix
+        score_names = list(scores)
+        fold_scores = np.stack([scores[score_name] for score_name in score_names])
+        means = fold_scores.mean(axis=1).tolist()
+        stds = fold_scores.std(axis=1).tolist()
+        score_report = {"_".join(score_name.split("_")[1:]):{"mean":means[k], 
+                                                         "std":stds[k],
+                                                         "all":fold_scores[k].tolist()} for k, score_name in enumerate(score_names)}
+    except Exception as e:
+        raise CustomException(e, sys)
+    
+    return score_report
+
+# Get test set evaluation metrics
+
+def get_test_report(true, predicted, scores=None):
+
+    """
+    Run Various Evaluation Metrics on data
+    """
+    try:
+        # Compute ROC-AUC using scores/probabilities if available
+        try:
+            roc_auc = None
+            if scores is not None:
+                arr = np.asarray(scores)
+                if arr.ndim == 1:
+                    roc_auc = roc_auc_score(true, arr)
+                elif arr.ndim == 2:
+                    # Multi-class probability/score matrix
+                    roc_auc = roc_auc_score(true, arr, multi_class='ovr')
+            else:
+                roc_auc = roc_auc_score(true, predicted)
+        except Exception:
+            if scores is None:
+                raise
+            # Fallback to label-based AUC (may be less informative)
+            roc_auc = roc_auc_score(true, predicted)
+
+        # Binary 0/1 labels: one bincount gives the confusion matrix (tn, fp, fn, tp) for all metrics
+        true_arr = np.asarray(true, dtype=np.int64)
+        pred_arr = np.asarray(predicted, dtype=np.int64)
+        if ((true_arr | pred_arr) & ~1).any():
+            raise ValueError("get_test_report expects binary labels encoded as 0/1")
+        tn, fp, fn, tp = np.bincount(2 * true_arr + pred_arr, minlength=4)
+        precision = tp / (tp + fp) if (tp + fp) else 0.0
+        recall = tp / (tp + fn) if (tp + fn) else 0.0
+        f1 = 2 * tp / (2 * tp + fp + fn) if (2 * tp + fp + fn) else 0.0
+
+        score_report = {"f1": float(f1),
+                        "accuracy": float((tp + tn) / (tp + tn + fp + fn)),
+                        "roc_auc": roc_auc,
+                        "precision": float(precision),
+                        "recall": float(recall)
+                        }
+        return score_report
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+# Get tunable hyperparameters for various machine learning models
+
+def getparams():
+
+    """
+    Returns a dictionary of tunable hyperparameters for various machine learning models.
+    
+    The dictionary includes common models like Decision Tree, Random Forest, Gradient Boosting,
+    Logistic Regression, XGBClassifier, CatBoosting Classifier, AdaBoost Classifier, MLPClassifier, and SVC.
+    
+    Returns:
+        dict: A dictionary where each key is a model name and the value is a dictionary of hyperparameters.
+    """
+    
+    params = {
+        "Decision Tree": {
+            "criterion": ["gini", "entropy"],
+            "splitter": ["best", "random"],
+            "max_depth": [None, 3, 5, 10],
+            "min_samples_split": [2, 5, 10],
+            "min_samples_leaf": [1, 2, 4],
+            "max_features": [None, "sqrt", "log2"]
+        },
+        "Random Forest": {
+            "n_estimators": [100, 200, 300],
+            "criterion": ["gini", "entropy"],
+            "max_depth": [None, 3, 5, 10],
+            "min_samples_split": [2, 5, 10],
+            "min_samples_leaf": [1, 2, 4]
+        },
+        "Gradient Boosting": {
+            "learning_rate": [0.001, 0.01, 0.1, 0.2],
+            "n_estimators": [100, 200, 300],
+            "subsample": [0.5, 0.7, 1.0],
+            "criterion": ["friedman_mse", "squared_error"],
+            "max_depth": [3, 5, 10],
+            "min_samples_split": [2, 5, 10],
+            "min_samples_leaf": [1, 2, 4],
+            "max_features": [None, "sqrt", "log2"]
+        },
+        "Logistic Regression": [
+            {
+                "penalty": ["l2"],
+                "C": [0.01, 0.1, 1.0, 10.0, 100.0],
+                "solver": ["lbfgs"],
+                "tol": [1e-3, 1e-4],
+                "max_iter": [1000, 3000, 5000]
+            },
+            {
+                "penalty": ["l1", "l2"],
+                "C": [0.01, 0.1, 1.0, 10.0, 100.0],
+                "solver": ["liblinear"],
+                "tol": [1e-3, 1e-4],
+                "max_iter": [1000, 3000, 5000]
+            },
+            {
+                "penalty": ["elasticnet"],
+                "C": [0.01, 0.1, 1.0, 10.0],
+                "solver": ["saga"],
+                "l1_ratio": [0.1, 0.5, 0.9],
+                "tol": [1e-3, 1e-4],
+                "max_iter": [3000, 5000]
+            }
+        ],
+        "XGBClassifier": {
+            "n_estimators": [100, 200, 300],
+            "learning_rate": [0.001, 0.01, 0.1, 0.2],
+            "max_depth": [3, 5, 7, 10],
+            "subsample": [0.5, 0.7, 1.0],
+            "gamma": [0, 0.1, 0.2],
+        },
+        "CatBoosting Classifier": {
+            "iterations": [100, 200, 500],
+            "learning_rate": [0.01, 0.1, 0.2, 0.3],
+            "depth": [3, 5, 7, 10],
+            "l2_leaf_reg": [1, 3, 5, 7],
+            "bootstrap_type": ["Bayesian", "Bernoulli", "MVS"]
+        },
+        "AdaBoost Classifier": {
+            "n_estimators": [50, 100, 200],
+            "learning_rate": [0.001, 0.01, 0.1, 1.0],
+            "algorithm": ["SAMME", "SAMME.R"]
+        },
+        "MLPClassifier": [
+            # adam with early stopping and higher max_iter
+            {
+                "solver": ["adam"],
+                "activation": ["relu", "tanh"],
+                "hidden_layer_sizes": [(50,), (100,), (100, 50)],
+                "alpha": [0.0001, 0.001],
+                "learning_rate": ["constant", "adaptive"],
+                "early_stopping": [True],
+                "max_iter": [600, 1000]
+            },
+            # lbfgs without early stopping
+            {
+                "solver": ["lbfgs"],
+                "activation": ["relu", "tanh"],
+                "hidden_layer_sizes": [(50,), (100,)],
+                "alpha": [0.0001, 0.001],
+                "max_iter": [600, 1000]
+            }
+        ],
+        "SVC": [
+            {"kernel": ["linear"], "C": [0.01, 0.1, 1.0, 10.0]},
+            {"kernel": ["rbf", "sigmoid"], "C": [0.01, 0.1, 1.0, 10.0], "gamma": ["scale", "auto"]},
+            {"kernel": ["poly"], "C": [0.01, 0.1, 1.0, 10.0], "degree": [3, 4], "gamma": ["scale", "auto"]}
+        ]
+    }
+    return params
+
+# ------------- Helper to load various tabular formats -------------
+
+def _unique_column_names(header):
+    """Normalise column names like pandas' default parser: blank names become ``Unnamed: i``
+    and repeated names get ``.1``, ``.2``, ... suffixes."""
+    columns = []
+    seen = {}
+    for i, name in enumerate(header):
+        if name is None or name == '':
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+def _read_text_table_arrow(file_path, sep):
+    """Read an uncompressed delimited text file with pyarrow (numpy-backed dtypes).
+
+    The pyarrow engine keeps blank and repeated header names as they are, so the
+    names are normalised the same way as the other readers.
+    """
+    df = pd.read_csv(file_path, sep=sep, engine='pyarrow')
+    df.columns = _unique_column_names(df.columns)
+    return df
+
+def _read_header(file_path, ext, sep, compression):
+    """Read only the header row of a table, without starting a full pandas/pyarrow parse.
+
+    Column names are normalised like pandas does: blank names become ``Unnamed: i``
+    and repeated names get ``.1``, ``.2``, ... suffixes.
+    """
+    if ext == '.parquet':
+        import pyarrow.parquet as pq
+        header = pq.read_schema(file_path).names
+    elif ext == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), None)
+        finally:
+            workbook.close()
+    elif compression == 'zip':
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open(archive.namelist()[0]) as raw:
+                header = next(csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''), delimiter=sep), None)
+    else:
+        opener = gzip.open if compression == 'gzip' else open
+        with opener(file_path, 'rt', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader(f, delimiter=sep), None)
+
+    if not header:
+        raise ValueError(f"No columns to parse from file '{file_path}'")
+
+    return _unique_column_names(header)
+
+def load_table(file_path, header_only: bool = False, chunksize=None):
+    """Load tabular data from many file formats (csv, tsv, txt, xlsx, parquet, gz, zip).
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the input file.
+    header_only : bool, default False
+        If True, return only the column headers (no data rows). Helpful when we
+        only need the column list.
+    chunksize : int, optional
+        For csv/tsv/txt files (possibly compressed), stream the table in DataFrames of
+        this many rows instead of loading it at once. Ignored for Excel, Parquet and *header_only*.
+
+    Returns
+    -------
+    pandas.DataFrame or pandas.io.parsers.TextFileReader
+        Loaded dataframe (may be empty when *header_only* is True), or an iterator of
+        DataFrame chunks when *chunksize* is given.
+    """
+    import pandas as pd  # local import to avoid circular issues
+
+    # Detect compression and true extension (handle double extensions like .csv.gz / .tsv.zip)
+    suffixes = [suffix.lower() for suffix in PurePath(file_path).suffixes]
+    compression = {'.gz': 'gzip', '.zip': 'zip'}.get(suffixes[-1]) if suffixes else None
+    if compression:
+        ext = suffixes[-2] if len(suffixes) >= 2 else ''  # real extension before .gz/.zip
+    else:
+        ext = suffixes[-1] if suffixes else ''
+
+    # Decide separator for text formats
+    sep = ','  # default
+    if ext in ['.tsv', '.txt']:
+        sep = '\t'
+
+    try:
+        if header_only:
+            # Only the first row is needed: read it directly
+            df = pd.DataFrame(columns=_read_header(file_path, ext, sep, compression))
+        elif ext == '.parquet':
+            # Columnar binary file (merged datasets): no text parsing
+            df = pd.read_parquet(file_path)
+        elif ext == '.xlsx':
+            # Excel file
+            df = pd.read_excel(file_path)
+        elif chunksize:
+            # Streamed read for large text tables (the pyarrow engine cannot chunk, use the C parser)
+            df = pd.read_csv(
+                file_path,
+                sep=sep,
+                engine='c',
+                on_bad_lines='skip',
+                compression=compression,
+                chunksize=chunksize
+            )
+        elif compression is None and ext in ('.csv', '.tsv', '.txt'):
+            # Plain text tables go through Arrow's multi-threaded parser; malformed files
+            # (ragged rows etc.) fall back to the tolerant python engine below
+            try:
+                df = _read_text_table_arrow(file_path, sep)
+            except Exception:
+                df = pd.read_csv(
+                    file_path,
+                    sep=sep,
+                    engine='python',
+                    on_bad_lines='skip'
+                )
+        else:
+            # CSV / TSV / TXT (possibly compressed)
+            df = pd.read_csv(
+                file_path,
+                sep=sep,
+                engine='python',
+                on_bad_lines='skip',
+                compression=compression
+            )
+    except Exception as e:
+        # Re-raise as our custom exception for consistency
+        raise CustomException(e, sys)
+
+    return df
+# ------------- End helper -------------
+
+
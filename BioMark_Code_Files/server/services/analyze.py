@@ -0,0 +1,821 @@
+# Import required packages
+import os, sys, re, ast, json, argparse, traceback
+import orjson
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Add ../modules directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.logger import logging
+from modules.machineLearning.classification import Classification
+from modules.statisticalTests.statistical_tests import StatisticalTestAnalysis
+from modules.modelExplanation.model_explanation import ModelExplanationAnalysis
+from modules.dataVisualization.dimensionality_reduction import Dimensionality_Reduction
+from modules.feature_selection import feature_rank
+from modules.utils import load_json
+from modules.utils import load_table
+
+# General Parameters
+
+# Differential Analysis Parameters
+feature_type = "microRNA"      # Feature type to analyze, used for diff analysis - for plot labels
+reference_class = ""           # Reference class (currently unused)
+lime_global_explanation_sample_num = 50  # Number of samples for LIME global explanations, diff analysis
+shap_model_finetune = False    # Model fine-tuning for SHAP explainability analysis
+lime_model_finetune = False    # Model fine-tuning for LIME explainability analysis
+scoring = "f1"                 # Model evaluation metric, diff analysis
+feature_importance_finetune = False  # Model fine-tuning for feature importance analysis
+num_top_features = 20          # Number of top features to use in feature selection, diff analysis
+
+# Clustering Analysis Parameters
+plotter = "seaborn"            # Visualization library selection, diff analysis
+dim = "3D"
+
+# Classification Analysis Parameters
+param_finetune = False         # For model hyperparameter optimization
+finetune_fraction = 1.0        # Fraction of data to use for fine-tuning
+save_best_model = True         # Whether to save the best performing model
+standard_scaling = True        # Whether to apply standard scaling for data normalization
+save_data_transformer = True   # Whether to save the data transformation model
+save_label_encoder = True      # Whether to save the label encoder
+verbose = True                 # Show detailed output during analysis
+
+# Differential Analysis and Classification Analysis Parameters
+test_size = 0.2                # Test set ratio for model training (0.2 for model and diff analysis, 0.3 for clustering)
+n_folds = 5                    # Number of cross-validation folds (5 for model and diff analysis, 3 for clustering)
+
+# Parameters that may be overridden through --params
+_ALLOWED_PARAMS = frozenset({
+    # Differential Analysis Parameters
+    "feature_type", "reference_class", "lime_global_explanation_sample_num", "shap_model_finetune",
+    "lime_model_finetune", "scoring", "feature_importance_finetune", "num_top_features",
+    # Clustering Analysis Parameters
+    "plotter", "dim",
+    # Classification Analysis Parameters
+    "param_finetune", "finetune_fraction", "save_best_model", "standard_scaling",
+    "save_data_transformer", "save_label_encoder", "verbose", "use_preprocessing",
+    # Differential Analysis and Classification Analysis Parameters
+    "test_size", "n_folds",
+})
+
+# Worker process setup for analysis stages run in parallel
+def _init_stage_worker(params):
+    """Apply the run's parameter overrides in a worker process and line-buffer its stdout,
+    so lines printed by the worker and the main process reach the Node.js reader intact."""
+    globals().update(params)
+    sys.stdout.reconfigure(line_buffering=True)
+
+# Categorical encoding info output (captured by Node.js)
+_emitted_encoding_info = set()
+
+def _emit_categorical_encoding_info(info):
+    """Print the CATEGORICAL_ENCODING_INFO line for the frontend, serialized once; a payload
+    already printed by this process is not printed again."""
+    if not info:
+        return
+    try:
+        payload = orjson.dumps(info, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        payload = json.dumps(info)
+    if payload in _emitted_encoding_info:
+        return
+    _emitted_encoding_info.add(payload)
+    print("CATEGORICAL_ENCODING_INFO:", payload)
+
+# Data Loading Function (Parquet sidecar cache)
+# Bumped whenever load_table() starts returning different frames (missing values, column names),
+# so sidecars written by older code are not reused
+DATA_CACHE_VERSION = 2
+
+def load_data(data_path):
+    """Load the input table, reusing a Parquet copy written next to it by an earlier run.
+
+    The driver runs once per class pair on the same file, so only the first run parses the
+    original file; the sidecar is used while it is newer than the data file. Parquet inputs
+    (merged datasets) are read directly.
+    """
+    if data_path.lower().endswith('.parquet'):
+        return load_table(data_path)
+    cache_path = f"{data_path}.v{DATA_CACHE_VERSION}.cache.parquet"
+    try:
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(data_path):
+            return pd.read_parquet(cache_path)
+    except Exception:
+        pass
+
+    df = load_table(data_path)
+    # Written under a temporary name and moved into place, so a concurrent run never reads a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        # Not cacheable (e.g. mixed-type object columns); the next run parses the file again
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return df
+
+# Class Filtering Functions
+def _numeric_equal(a_str, t_str):
+    # compare strings a_str and t_str numerically when possible
+    try:
+        return float(a_str) == float(t_str)
+    except Exception:
+        return False
+
+def _cell_matches(cell_val, targets):
+    # Return True if cell_val (various formats) contains any of targets
+    if pd.isna(cell_val):
+        return False
+    s = str(cell_val).strip()
+    # try to parse python literal lists/tuples
+    if s.startswith('[') and s.endswith(']'):
+        try:
+            parsed = ast.literal_eval(s)
+            if isinstance(parsed, (list, tuple, set)):
+                for item in parsed:
+                    item_s = str(item).strip()
+                    if item_s in targets:
+                        return True
+                    # numeric compare
+                    for t in targets:
+                        if _numeric_equal(item_s, t):
+                            return True
+        except Exception:
+            pass
+    # check common delimiters
+    for delim in [',', ';', '|', '/']:
+        if delim in s:
+            parts = [p.strip() for p in s.split(delim) if p.strip()]
+            for p in parts:
+                if p in targets:
+                    return True
+                for t in targets:
+                    if _numeric_equal(p, t):
+                        return True
+    # fallback to direct match or numeric equality
+    if s in targets:
+        return True
+    for t in targets:
+        if _numeric_equal(s, t):
+            return True
+    return False
+
+def match_class_labels(labels, selected_classes):
+    """Return a boolean row mask of the label cells that hold one of the selected classes.
+
+    Cells may be plain values (numeric or string), list-like strings ("['1','2']") or
+    delimited strings ("1;2" or "1,2"); an item matches a class as a string or numerically
+    ("1.0" == "1"). Each distinct label is checked once and missing cells never match.
+    """
+    targets = [str(x).strip() for x in selected_classes]
+    # factorize gives every row the code of its value (-1 for missing cells), and the row
+    # mask is np.isin over the codes of the matching values
+    codes, unique_values = pd.factorize(labels)
+    unique_labels = pd.Series(unique_values)
+    labels_str = unique_labels.astype(str).str.strip()
+    # Fast path: plain cells equal to a selected class (vectorized)
+    matched = labels_str.isin(set(targets)).to_numpy(dtype=bool)
+    delimited = ~matched & labels_str.str.contains(r'[\[,;|/]', regex=True, na=False).to_numpy(dtype=bool)
+
+    target_floats = []
+    for t in targets:
+        try:
+            target_floats.append(float(t))
+        except ValueError:
+            pass
+    if target_floats:
+        # Numeric equality cannot be expressed as a regex: plain values are compared as floats
+        # in one step, and every delimited value is parsed by _cell_matches
+        label_floats = pd.to_numeric(labels_str, errors='coerce').to_numpy(dtype=np.float64)
+        matched |= ~delimited & np.isin(label_floats, np.array(target_floats, dtype=np.float64))
+        candidates = delimited
+    elif targets and delimited.any():
+        # A compiled regex union preselects the values holding a selected class as a token between
+        # delimiters, brackets or quotes. It is looser than _cell_matches (it also accepts "[A" or
+        # "[A]" for class "A"), so the preselected values are confirmed by _cell_matches
+        token_pattern = re.compile(r"(?:^|[,;|/\[\]'\"])\s*(?:"
+                                   + "|".join(re.escape(t) for t in targets)
+                                   + r")\s*(?:$|[,;|/\[\]'\"])")
+        candidates = delimited & labels_str.str.contains(token_pattern, regex=True, na=False).to_numpy(dtype=bool)
+    else:
+        candidates = np.zeros_like(delimited)
+    if candidates.any():
+        matched[candidates] = unique_labels[candidates].map(lambda v: _cell_matches(v, targets)).to_numpy(dtype=bool)
+    return np.isin(codes, np.flatnonzero(matched))
+
+# Statistical Analysis Function
+def run_statistical_analysis(data, selectedIllnessColumn, selectedSampleColumn, outdir, analyses):
+    print("analyses: ", analyses)
+    print("type(analyses): ", type(analyses))
+    print("selectedIllnessColumn: ", selectedIllnessColumn)
+    print("type(selectedIllnessColumn): ", type(selectedIllnessColumn))
+    
+    # Data validation: check if selectedIllnessColumn and selectedSampleColumn exist
+    if selectedIllnessColumn not in data.columns:
+        print(f"ERROR: Column '{selectedIllnessColumn}' not found in dataset!")
+        return
+        
+    if selectedSampleColumn not in data.columns:
+        print(f"ERROR: Column '{selectedSampleColumn}' not found in dataset!")
+        return
+    
+    # Class_names check: at least 2 unique classes in the dataframe?
+    unique_classes = data[selectedIllnessColumn].unique()
+    print("Unique classes found:", unique_classes)
+    
+    if len(unique_classes) < 2:
+        print(f"At least 2 classes are required, but only {len(unique_classes)} found. Analysis cannot proceed.")
+        return
+        
+    # Check for missing values in class column
+    if data[selectedIllnessColumn].isna().any():
+        print(f"WARNING: Missing (NA/None) values found in column '{selectedIllnessColumn}'.")
+        data = data.dropna(subset=[selectedIllnessColumn])
+        print(f"Missing values filtered. New data shape: {data.shape}")
+        
+    # Process analyses parameter
+    if isinstance(analyses, str):
+        if ',' in analyses:
+            analyses_list = analyses.split(',')
+        else:
+            analyses_list = [analyses]
+    else:
+        analyses_list = analyses
+        
+    analyses_list = [a.strip() for a in analyses_list if a and a.strip()]
+    
+    if not analyses_list:
+        print("ERROR: No valid analysis specified!")
+        return
+        
+    print("analyses_list:", analyses_list)
+    
+    try:
+        analyzer = StatisticalTestAnalysis(
+            data,
+            analyses=analyses_list,
+            labels_column=selectedIllnessColumn,
+            reference_class=reference_class,
+            sample_id_column=selectedSampleColumn,
+            outdir=outdir,
+            feature_type=feature_type,
+            top_features_to_plot=num_top_features
+        )
+        analyzer.run_all_analyses()
+        
+        if hasattr(analyzer, 'categorical_encoding_info') and analyzer.categorical_encoding_info:
+            print("DEBUG: Found categorical encoding info:", analyzer.categorical_encoding_info)
+            _emit_categorical_encoding_info(analyzer.categorical_encoding_info)
+        else:
+            print("DEBUG: No categorical encoding info found")
+            
+    except Exception as e:
+        print(f"ERROR: Exception occurred while running StatisticalTestAnalysis: {str(e)}")
+        traceback.print_exc()
+
+# Model Explanation Function
+def run_model_explanation(data, selectedIllnessColumn, selectedSampleColumn, outdir, model_list, explanationAnalyzes):
+    """Train classification model(s) to get trained models and run explanation methods.
+
+    The explainer is chosen per trained model inside the SHAP analysis (TreeExplainer for
+    tree ensembles, LinearExplainer for logistic regression, the generic explainer otherwise).
+    """
+    # Train only to obtain models for explanation
+    print("Running classification to get model for explanation.....\n")
+    
+    # Check if the sample column exists, if not, try "Sample ID" as fallback for merged files
+    if selectedSampleColumn not in data.columns:
+        print(f"WARNING: Column '{selectedSampleColumn}' not found in dataset!")
+        if "Sample ID" in data.columns:
+            print(f"Using 'Sample ID' instead (merged files always use 'Sample ID')")
+            selectedSampleColumn = "Sample ID"
+        else:
+            print(f"ERROR: Neither '{selectedSampleColumn}' nor 'Sample ID' found in dataset!")
+            print(f"Available columns: {data.columns.tolist()}")
+            return
+    
+    clf = Classification(
+        data=data.drop(columns=selectedSampleColumn),
+        labels_column=selectedIllnessColumn,
+        n_folds=n_folds, test_size=test_size,
+        outdir=os.path.join(outdir, "explanation_models"),
+        param_finetune=param_finetune, finetune_fraction=finetune_fraction,
+        save_best_model=True, standard_scaling=standard_scaling,
+        save_data_transformer=True, save_label_encoder=True,
+        model_list=model_list,
+        verbose=False,
+        scoring=scoring,
+        num_top_features=num_top_features,
+        use_preprocessing=False
+    )
+    clf.data_transfrom()
+    # Emit categorical encoding info for frontend modal if available
+    try:
+        if hasattr(clf, 'categorical_encoding_info') and clf.categorical_encoding_info:
+            _emit_categorical_encoding_info(clf.categorical_encoding_info)
+    except Exception:
+        pass
+    trained_models_info, preprocessor = clf.initiate_model_trainer(return_models=True)
+    print("\nRunning EXPLANATION methods.....\n")
+    explanation_runner = ModelExplanationAnalysis(
+        X_data = clf.X,  # <-- Hazır remapped X verisi
+        y_data = clf.y,  # <-- Hazır encoded y verisi
+        class_names = clf.class_names, # <-- Hazır sınıf isimleri
+        feature_map_reverse = clf.feature_map_reverse, # <-- Doğru harita
+        analyses=explanationAnalyzes,
+        labels_column=selectedIllnessColumn,
+        sample_id_column=selectedSampleColumn,
+        outdir=outdir,
+        feature_type=feature_type,
+        test_size=test_size,
+        lime_global_explanation_sample_num=lime_global_explanation_sample_num,
+        shap_model_finetune=shap_model_finetune,
+        lime_model_finetune=lime_model_finetune,
+        n_folds=n_folds,
+        scoring=scoring,
+        top_features_to_plot=num_top_features,
+        feature_importance_finetune=feature_importance_finetune,
+        trained_models_info=trained_models_info,
+        preprocessor=preprocessor,
+        X_test=clf.X_test_raw,
+        y_test=clf.y_test
+    )
+    explanation_runner.run_all_analyses()
+
+# Initial Visualization Function
+def initial_visualization(data, visualizations, outdir, selectedIllnessColumn):
+    print("visualizations: ", visualizations)
+    if visualizations and visualizations != ['']:
+        dim_visualizer = Dimensionality_Reduction(data=data,
+                                                labels_column=selectedIllnessColumn,
+                                                plotter=plotter,
+                                                outdir=os.path.join(outdir, "initial"))
+        dim_visualizer.runPlots(runs=visualizations)
+        
+        # Return categorical encoding information for frontend
+        if hasattr(dim_visualizer, 'categorical_encoding_info') and dim_visualizer.categorical_encoding_info:
+            print("DEBUG: Found categorical encoding info in visualization:", dim_visualizer.categorical_encoding_info)
+            _emit_categorical_encoding_info(dim_visualizer.categorical_encoding_info)
+        else:
+            print("DEBUG: No categorical encoding info found in visualization")
+
+# Initial Model Training Function
+def initial_model_training(data, selectedIllnessColumn, outdir, model_list):
+    print("model_list: ", model_list)
+    if model_list and model_list != ['']:
+        clf = Classification(
+            data=data,
+            labels_column=selectedIllnessColumn,
+            n_folds=n_folds,
+            test_size=test_size,
+            outdir=os.path.join(outdir, "initial"),
+            param_finetune=param_finetune,
+            finetune_fraction = finetune_fraction,
+            save_best_model = save_best_model,
+            standard_scaling = standard_scaling,
+            save_data_transformer = save_data_transformer,
+            save_label_encoder = save_label_encoder,            
+            model_list=model_list,
+            verbose=verbose,
+            scoring=scoring,
+            num_top_features=num_top_features,
+            use_preprocessing=False
+        )
+        clf.data_transfrom()
+        # Emit categorical encoding info for frontend modal if available
+        try:
+            if hasattr(clf, 'categorical_encoding_info') and clf.categorical_encoding_info:
+                _emit_categorical_encoding_info(clf.categorical_encoding_info)
+        except Exception:
+            pass
+        clf.initiate_model_trainer()
+
+# Feature Selection Function (class-pair aware)
+def feature_selection(outdir, class_pair: str):
+    """Return top ranked features for the given class pair if available.
+
+    Parameters
+    ----------
+    outdir : str
+        Directory that contains ``feature_importances.json``.
+    class_pair : str
+        Target class pair key in the form "ClassA_ClassB" (case-sensitive, depends on previous save).
+
+    Returns
+    -------
+    list | None
+        List of top ``num_top_features`` features for the given class pair or ``None``
+        if the class pair does not exist in the file.
+    """
+
+    # Load saved feature importances (load_json parses with orjson)
+    feature_importances_path = os.path.join(outdir, "feature_importances.json")
+    feature_importances = load_json(feature_importances_path)
+
+    if not feature_importances or not isinstance(feature_importances, dict):
+        return None
+
+    # Try both possible key orders (e.g. A_B and B_A)
+    possible_keys = [class_pair]
+    if "_" in class_pair:
+        cls1, cls2 = class_pair.split("_", 1)
+        possible_keys.append(f"{cls2}_{cls1}")
+
+    selected_key = next((k for k in possible_keys if k in feature_importances), None)
+    if not selected_key:
+        # No differential analysis for this class pair
+        return None
+
+    # Use only the selected class pair data for ranking
+    filtered_importances = {selected_key: feature_importances[selected_key]}
+
+    top_n = feature_rank(top_features=filtered_importances,
+                         num_top_features=num_top_features,
+                         feature_type=feature_type,
+                         outdir=outdir)
+
+    return top_n
+
+# After Feature Selection Visualization Function
+def visualization_after_feature_selection(data, visualizations, outdir, selectedIllnessColumn):
+    if(visualizations != ['']):
+        dim_visualizer = Dimensionality_Reduction(data,
+                                                labels_column=selectedIllnessColumn,
+                                                plotter=plotter,
+                                                outdir=os.path.join(outdir, "AfterFeatureSelection"))
+        dim_visualizer.runPlots(runs=visualizations)
+
+# After Feature Selection Model Training Function
+def model_training_after_feature_selection(data, selectedIllnessColumn, outdir, model_list):
+    if model_list and model_list != ['']:
+        clf = Classification(
+            data=data,
+            labels_column=selectedIllnessColumn,
+            n_folds=n_folds,
+            test_size=test_size,
+            outdir=os.path.join(outdir, "AfterFeatureSelection"),
+            param_finetune=param_finetune,
+            finetune_fraction = finetune_fraction,
+            save_best_model = save_best_model,
+            standard_scaling = standard_scaling,
+            save_data_transformer = save_data_transformer,
+            save_label_encoder = save_label_encoder,
+            model_list=model_list,
+            verbose=verbose,
+            num_top_features=num_top_features,
+            use_preprocessing=False
+        )
+        clf.data_transfrom()
+        clf.initiate_model_trainer()
+
+# Main script execution
+if __name__ == "__main__":
+    # Set up command line arguments
+    parser = argparse.ArgumentParser(description='Parameters for biomarker analysis')
+    parser.add_argument('data_path', help='Path to the data file')
+    parser.add_argument('selectedIllnessColumn', help='Name of the illness column')
+    parser.add_argument('selectedSampleColumn', help='Name of the sample column')
+    parser.add_argument('selectedClasseses', help='Selected classes')
+    parser.add_argument('differentialAnalyzes', help='Differential analysis methods')
+    parser.add_argument('clusteringAnalyzes', help='Clustering analysis methods')
+    parser.add_argument('classificationAnalyzes', help='Classification analysis methods')
+    parser.add_argument('explanationAnalyzes', help='Explanation analysis methods')
+    parser.add_argument('nonFeatureColumns', help='Non-feature columns')
+    parser.add_argument('isDiffAnalysis', help='Whether to perform differential analysis')
+    parser.add_argument('afterFeatureSelection', help='Whether to perform analysis after feature selection')
+    parser.add_argument('--params', help='Parameter settings (in JSON format)', default='{}')
+    parser.add_argument('--class-pair', dest='class_pairs', action='append', default=[],
+                        help='Additional classes to analyze on the same loaded data (repeatable, e.g. "A,B")')
+
+    args = parser.parse_args()
+    
+    # Extract arguments
+    data_path = args.data_path
+    selectedIllnessColumn = args.selectedIllnessColumn
+    selectedSampleColumn = args.selectedSampleColumn
+    selectedClasseses = [cls for cls in args.selectedClasseses.split(',')] if args.selectedClasseses else []
+    class_pairs = [selectedClasseses] + [pair.split(',') for pair in args.class_pairs if pair]
+    
+    # Process analysis arguments safely
+    def process_arg(arg):
+        if not arg:
+            return []
+        # Standardize format and split
+        return [item.strip() for item in arg.lower().replace('-', '_').split(",") if item.strip()]
+
+    statistical_tests = process_arg(args.differentialAnalyzes)  # legacy arg name, now statistical tests
+    dimensionality_reduction = process_arg(args.clusteringAnalyzes)
+    classification_methods = process_arg(args.classificationAnalyzes)
+    explanation_methods = process_arg(args.explanationAnalyzes)
+    nonFeatureColumns = process_arg(args.nonFeatureColumns)
+    selected_diff_analyses = process_arg(args.isDiffAnalysis)
+    afterFeatureSelection = args.afterFeatureSelection.lower() == 'true'
+
+    # Ensure explanation methods are not run twice if they are also in the statistical list
+    if explanation_methods:
+        statistical_tests = [item for item in statistical_tests if item not in explanation_methods]
+        # Also remove from selected_diff_analyses to prevent double runs from older logic paths
+        selected_diff_analyses = [item for item in selected_diff_analyses if item not in explanation_methods]
+
+    # Load parameter settings in JSON format
+    params_json = {}
+    if args.params and args.params != '{}':
+        try:
+            params_json = json.loads(args.params)
+            
+            # First check and update dim parameter
+            if "dim" in params_json:
+                globals()["dim"] = params_json["dim"]
+                print(f"dim parameter updated: {dim}")
+        except Exception as e:
+            print(f"Error parsing parameter JSON: {e}")
+    
+    # Add dim variable to clusteringAnalyzes argument (e.g., 2d_ or 3d_)
+    if dimensionality_reduction:
+        dim_prefix = dim.lower() + "_" if dim else ""
+        dimensionality_reduction = [dim_prefix + analysis for analysis in dimensionality_reduction]
+    else:
+        dimensionality_reduction = []
+    
+    # Update other parameters
+    if params_json:
+        try:
+            # Update Differential, Clustering (dim updated above), Classification and Common Parameters
+            globals().update({key: params_json[key] for key in _ALLOWED_PARAMS if key in params_json})
+            unknown_params = sorted(set(params_json) - _ALLOWED_PARAMS)
+            if unknown_params:
+                logging.warning(f"Ignoring unknown parameter settings: {unknown_params}")
+            # Aggregation parameters moved to final results combine step (no env injection here)
+                
+        except Exception as e:
+            print(f"Error loading parameter settings: {e}")
+    
+    # Print parameters
+    """ print("Data Path:", data_path)
+    print("Selected Illness Column:", selectedIllnessColumn)
+    print("Selected Sample Column:", selectedSampleColumn)
+    print("Selected Classes:", selectedClasseses)
+    print("Statistical Tests:", statistical_tests)
+    print("Dimensionality Reduction:", dimensionality_reduction)
+    print("Classification Analyses:", classification_methods)
+    print("Model Explanation:", explanation_methods)
+    print("Non-Feature Columns:", nonFeatureColumns)
+    print("Selected Differential Analyses:", selected_diff_analyses)
+    print("After Feature Selection:", afterFeatureSelection) """
+    
+    """ # Print parameter settings
+    print("\nParameter Settings:")
+    print(f"feature_type: {feature_type}")
+    print(f"lime_global_explanation_sample_num: {lime_global_explanation_sample_num}")
+    print(f"shap_model_finetune: {shap_model_finetune}")
+    print(f"lime_model_finetune: {lime_model_finetune}")
+    print(f"scoring: {scoring}")
+    print(f"feature_importance_finetune: {feature_importance_finetune}")
+    print(f"num_top_features: {num_top_features}")
+    print(f"plotter: {plotter}")
+    print(f"dim: {dim}")
+    print(f"param_finetune: {param_finetune}")
+    print(f"finetune_fraction: {finetune_fraction}")
+    print(f"save_best_model: {save_best_model}")
+    print(f"standard_scaling: {standard_scaling}")
+    print(f"save_data_transformer: {save_data_transformer}")
+    print(f"save_label_encoder: {save_label_encoder}")
+    print(f"verbose: {verbose}")
+    print(f"test_size: {test_size}")
+    print(f"n_folds: {n_folds}") """
+
+    # Set analyses parameters
+    # Map parsed args to variables used below
+    analyses = statistical_tests
+    model_list = classification_methods
+    visualizations = dimensionality_reduction
+
+    # Output directory
+    base_name = os.path.basename(data_path)
+    file_name_without_ext = os.path.splitext(base_name)[0]
+    outdir = os.path.join("results", file_name_without_ext)
+    
+    # Load data
+    loaded_df = load_data(data_path)
+
+    # Each class pair reuses the loaded table; the pairs run one after another because their
+    # stages update the same results/<file>/feature_importances.json
+    for selectedClasseses in class_pairs:
+        df = loaded_df
+
+        # Create a unique path for this class pair analysis
+        class_pair_key = f"{selectedClasseses[0]}_{selectedClasseses[1]}" if len(selectedClasseses) >= 2 else "all_classes"
+        RESULTS_PATH = os.path.join(outdir, class_pair_key)
+        FEATURE_RANKING_PATH = os.path.join(outdir, "feature_ranking", class_pair_key)
+        os.makedirs(RESULTS_PATH, exist_ok=True)
+        os.makedirs(FEATURE_RANKING_PATH, exist_ok=True)
+
+        # Normalize selected classes to strings (strip whitespace)
+        selected_classes_norm = [str(x).strip() for x in selectedClasseses]
+
+        # Debug: show original DataFrame info
+        print(f"Original df shape before filtering: {df.shape}")
+        try:
+            print(f"Sample unique values in column '{selectedIllnessColumn}':", pd.Series(df[selectedIllnessColumn].dropna().astype(str).str.strip().unique()[:50]))
+        except Exception:
+            pass
+
+        print(f"Filtering by selected classes (stringified): {selected_classes_norm}")
+        mask = match_class_labels(df[selectedIllnessColumn], selected_classes_norm)
+        print(f"Rows matching selected classes: {mask.sum()} / {len(mask)}")
+        df = df[mask]
+
+        """ Data Preparation for Analysis """
+        # Check column names and find matching columns
+        # Case-insensitive lookup: uppercased name -> first column with that name
+        upper_map = {}
+        for df_col in df.columns:
+            upper_map.setdefault(str(df_col).upper(), df_col)
+        valid_columns = []
+        for col in nonFeatureColumns:
+            # Convert to uppercase and check
+            upper_col = col.upper()
+            # Check for exact match
+            if upper_col in df.columns:
+                valid_columns.append(upper_col)
+            elif upper_col in upper_map:
+                # Case-insensitive match
+                valid_columns.append(upper_map[upper_col])
+    
+        # Drop matching columns from dataframe
+        data = df.drop(columns=valid_columns).reset_index(drop=True)
+
+        # Fix for merged files: if the selected sample column doesn't exist but "Sample ID" does,
+        # use "Sample ID" instead (merged files always standardize to "Sample ID")
+        if selectedSampleColumn not in data.columns:
+            print(f"WARNING: Column '{selectedSampleColumn}' not found in dataset!")
+            if "Sample ID" in data.columns:
+                print(f"Using 'Sample ID' instead (merged files always use 'Sample ID')")
+                selectedSampleColumn = "Sample ID"
+            else:
+                print(f"ERROR: Neither '{selectedSampleColumn}' nor 'Sample ID' found in dataset!")
+                print(f"Available columns: {data.columns.tolist()}")
+                exit(1)
+
+        # If `afterFeatureSelection` is true, we need to perform feature selection now.
+        if afterFeatureSelection:
+            print("\n--- Performing Feature Selection ---")
+        
+            # We need the class pair to find the correct ranked features file.
+            if len(selectedClasseses) >= 2:
+                class_pair_key = f"{selectedClasseses[0]}_{selectedClasseses[1]}"
+            
+                # This function loads feature_importances.json, ranks them using feature_rank,
+                # and returns the top N features.
+                top_features = feature_selection(outdir, class_pair=class_pair_key)
+            
+                if top_features:
+                    print(f"Top {len(top_features)} features selected for class pair '{class_pair_key}'.")
+                
+                    # The columns to keep are the selected features plus the essential metadata columns.
+                    columns_to_keep = top_features + [selectedIllnessColumn, selectedSampleColumn]
+                
+                    # Filter the dataframe to keep only these columns.
+                    # Ensure we only select columns that actually exist in the dataframe to prevent errors.
+                    existing_columns_to_keep = [col for col in columns_to_keep if col in data.columns]
+                    # (a copy, because the dtype coercion below assigns into its columns)
+                    data = data[existing_columns_to_keep].copy()
+                
+                    print("Data shape after feature selection:", data.shape)
+                else:
+                    print(f"Warning: No top features found for class pair '{class_pair_key}'. Proceeding with all features.")
+            else:
+                print("Warning: At least two classes are required for feature selection. Proceeding with all features.")
+
+        # Ensure feature dtypes are acceptable for XGBoost: int/float/bool/category
+        # (runs after feature selection, so only the columns that survive it are coerced)
+        obj_cols = data.select_dtypes(include=['object']).columns.tolist()
+        if obj_cols:
+            print(f"Converting object-typed feature columns: {obj_cols}")
+            for col in obj_cols:
+                # skip the label column if present (shouldn't be in data here)
+                if col == selectedIllnessColumn or col == selectedSampleColumn:
+                    continue
+                # try numeric conversion (one conversion; NaN mask, count and median all come from it)
+                coerced = pd.to_numeric(data[col], errors='coerce')
+                values = coerced.to_numpy(dtype=np.float64)
+                missing = np.isnan(values)
+                n_missing = int(missing.sum())
+                if n_missing < len(values):
+                    # If a reasonable number converted, use numeric with median imputation for NaNs
+                    if n_missing:
+                        med = np.median(values[~missing])
+                        data[col] = np.where(missing, med, values)
+                    else:
+                        med = np.median(values)
+                        data[col] = coerced
+                    print(f"Column {col}: converted to numeric with median imputation (median={med})")
+                else:
+                    # fallback: integer codes of the sorted categories so XGBoost gets numeric dtype
+                    s = data[col]
+                    if s.isna().any():
+                        mode = s.mode(dropna=True)
+                        # if no mode, fill with empty string category
+                        s = s.fillna(mode.iloc[0] if len(mode) else '')
+                    try:
+                        codes, categories = pd.factorize(s, sort=True)
+                    except TypeError:
+                        # mixed, unorderable values keep first-appearance order
+                        codes, categories = pd.factorize(s, sort=False)
+                    data[col] = codes
+                    print(f"Column {col}: converted to categorical codes (int) with {len(categories)} categories")
+
+        # Shrink numeric feature columns to the smallest dtype pandas can downcast them to
+        # (the label and sample columns keep their dtypes)
+        for kind, downcast in (('integer', 'integer'), ('floating', 'float')):
+            cols = [c for c in data.select_dtypes(include=[kind]).columns
+                    if c != selectedIllnessColumn and c != selectedSampleColumn]
+            if cols:
+                data[cols] = data[cols].apply(pd.to_numeric, downcast=downcast)
+
+        # Features and labels without the sample column, built once for the visualization and
+        # classification stages
+        feature_data = None
+        if visualizations or (model_list and not explanation_methods):
+            feature_data = data.drop(columns=selectedSampleColumn)
+
+        # Visualization (branch by afterFeatureSelection)
+        # It only writes its own plots, so on multi-core machines it runs in a worker process while
+        # the statistical tests and classification run here (those two both update
+        # feature_importances.json and stay sequential)
+        visualization_pool = None
+        visualization_future = None
+        if visualizations:
+            if afterFeatureSelection:
+                print("visualization_after_feature_selection function.....\n")
+                visualization_stage = (visualization_after_feature_selection,
+                                       feature_data,
+                                       visualizations,
+                                       RESULTS_PATH,
+                                       selectedIllnessColumn)
+            else:
+                print("initial_visualization function.....\n")
+                visualization_stage = (initial_visualization,
+                                       feature_data,
+                                       visualizations,
+                                       RESULTS_PATH,
+                                       selectedIllnessColumn)
+            n_cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+            if n_cpus > 1 and (analyses or model_list):
+                sys.stdout.reconfigure(line_buffering=True)
+                visualization_pool = ProcessPoolExecutor(max_workers=1,
+                                                         initializer=_init_stage_worker,
+                                                         initargs=({"plotter": plotter},))
+                visualization_future = visualization_pool.submit(*visualization_stage)
+            else:
+                visualization_stage[0](*visualization_stage[1:])
+
+        # Run statistical analysis
+        if analyses:
+            print("\nrun_statistical_analysis function for STATISTICAL TESTS.....\n")
+            run_statistical_analysis(data, selectedIllnessColumn, selectedSampleColumn, RESULTS_PATH, analyses)
+    
+        # Handle Classification and Explanation
+        # The branches are exclusive: with explanation methods, run_model_explanation trains the
+        # models once and hands them to the explainers, so no run trains the same models twice
+        if model_list:
+            if explanation_methods:
+                run_model_explanation(
+                    data=data,
+                    selectedIllnessColumn=selectedIllnessColumn,
+                    selectedSampleColumn=selectedSampleColumn,
+                    outdir=RESULTS_PATH,
+                    model_list=model_list,
+                    explanationAnalyzes=explanation_methods
+                )
+
+            else:
+                # Run classification (branch by afterFeatureSelection)
+                if afterFeatureSelection:
+                    print("model_training_after_feature_selection function for CLASSIFICATION.....\n")
+                    model_training_after_feature_selection(
+                        feature_data,
+                        selectedIllnessColumn,
+                        RESULTS_PATH,
+                        model_list
+                    )
+                else:
+                    print("initial_model_training function for CLASSIFICATION.....\n")
+                    initial_model_training(
+                        feature_data,
+                        selectedIllnessColumn,
+                        RESULTS_PATH,
+                        model_list
+                    )
+
+        if visualization_future is not None:
+            visualization_future.result()
+            visualization_pool.shutdown()
+
+    exit()
\ No newline at end of file
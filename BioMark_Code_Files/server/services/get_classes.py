@@ -0,0 +1,181 @@
+import os, sys
+import argparse
+import html
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import re
+
+
+# Add modules directory to sys.path and import helper
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from modules.logger import logging
+
+# Runs of characters that are unsafe in file names
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w\-\.]+")
+
+def sanitize_filename(name: str) -> str:
+    # Replace unsafe chars and collapse spaces
+    name = _UNSAFE_FILENAME_CHARS.sub("_", name.strip())
+    return name or "column"
+
+def count_values_arrow(data_path, column_name):
+    """Count the non-null values of one CSV column with pyarrow, in order of first appearance.
+
+    Only the selected column is converted, and the unique values and their counts come from
+    a single hash pass. Returns the values (typed like pandas would print them) and counts.
+    """
+    table = pacsv.read_csv(data_path,
+                           read_options=pacsv.ReadOptions(use_threads=True),
+                           # Empty/NA cells in text columns are missing values, as in pandas
+                           convert_options=pacsv.ConvertOptions(include_columns=[column_name],
+                                                                strings_can_be_null=True))
+    column = table.column(column_name)
+    value_counts = pc.value_counts(pc.drop_null(column))
+    values = value_counts.field('values').to_pylist()
+    counts = value_counts.field('counts').to_pylist()
+    # pandas reads an integer column with missing cells as float64
+    if pa.types.is_integer(column.type) and column.null_count:
+        values = [float(v) for v in values]
+    return values, counts
+
+# Load data and print unique values of the specified column
+def load_data(data_path, column_name, outdir):
+    """Print the unique values of *column_name* and return them with their counts.
+
+    Returns the counts as a Series indexed by value (first-appearance order), which is all
+    the distribution plot needs.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    values = None
+    # Performant path: pyarrow reads and counts only the selected column
+    if not data_path.lower().endswith(('.xlsx', '.parquet')):
+        try:
+            values, counts = count_values_arrow(data_path, column_name)
+        except Exception:
+            values = None
+    if values is None:
+        try:
+            if data_path.lower().endswith('.xlsx'):
+                df = pd.read_excel(data_path, usecols=[column_name])
+            elif data_path.lower().endswith('.parquet'):
+                df = pd.read_parquet(data_path, columns=[column_name])
+            else:
+                df = pd.read_csv(data_path, usecols=[column_name])
+        except Exception:
+            # Fallback: load full table and select the column (modules.utils imports the
+            # scikit-learn stack, so it is only loaded on this path)
+            from modules.utils import load_table
+            df_all = load_table(data_path)
+            if column_name not in df_all.columns:
+                raise ValueError(f"Column '{column_name}' not found in file: {data_path}")
+            df = df_all[[column_name]]
+        column = df[column_name].dropna()
+        values = column.unique().tolist()
+        counts = column.value_counts().reindex(values).tolist()
+    # Print unique classes (list)
+    print(values)
+    return pd.Series(counts, index=pd.Index(values, name=column_name), name='count')
+
+# Default matplotlib colour cycle (tab10), so the SVG and PNG charts match
+_BAR_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+               "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"]
+
+def write_distribution_svg(counts, column_name, image_path):
+    """Write the class distribution bar chart as a small hand-built SVG (no plotting library)."""
+    width, height = 800, 480
+    left, right, top, bottom = 60, 20, 30, 80
+    plot_width = width - left - right
+    plot_height = height - top - bottom
+    n = max(len(counts), 1)
+    max_count = max(int(counts.max()), 1) if len(counts) else 1
+    slot = plot_width / n
+    bar_width = slot * 0.8
+    rotate = n > 8  # long category lists get slanted labels
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+    for i, (label, count) in enumerate(zip(counts.index, counts.values)):
+        bar_height = plot_height * int(count) / max_count
+        x = left + i * slot + (slot - bar_width) / 2
+        y = top + plot_height - bar_height
+        center = x + bar_width / 2
+        text = html.escape(str(label))
+        parts.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_width:.1f}" height="{bar_height:.1f}" '
+                     f'fill="{_BAR_COLORS[i % len(_BAR_COLORS)]}"/>')
+        parts.append(f'<text x="{center:.1f}" y="{y - 4:.1f}" text-anchor="middle">{int(count)}</text>')
+        label_y = top + plot_height + 16
+        if rotate:
+            parts.append(f'<text x="{center:.1f}" y="{label_y:.1f}" text-anchor="end" '
+                         f'transform="rotate(-45 {center:.1f} {label_y:.1f})">{text}</text>')
+        else:
+            parts.append(f'<text x="{center:.1f}" y="{label_y:.1f}" text-anchor="middle">{text}</text>')
+    parts.append(f'<line x1="{left}" y1="{top + plot_height}" x2="{width - right}" y2="{top + plot_height}" stroke="black"/>')
+    parts.append(f'<line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_height}" stroke="black"/>')
+    parts.append(f'<text x="{left + plot_width / 2:.1f}" y="{height - 10}" text-anchor="middle" font-size="14">'
+                 f'{html.escape(str(column_name))}</text>')
+    parts.append(f'<text x="16" y="{top + plot_height / 2:.1f}" text-anchor="middle" font-size="14" '
+                 f'transform="rotate(-90 16 {top + plot_height / 2:.1f})">count</text>')
+    parts.append('</svg>')
+
+    with open(image_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+# Visualize the distribution of a categorical column in the data
+def visualize_diagnosis_distribution(counts, column_name, outdir, image_format="svg"):
+    # Plot the distribution of the Diagnosis Group from the precomputed value counts
+    # (numeric classes in ascending order, others in order of first appearance, as before)
+    if pd.api.types.is_numeric_dtype(counts.index):
+        counts = counts.sort_index()
+    safe_col = sanitize_filename(column_name)
+    if image_format == "svg":
+        # A single bar chart needs no raster pipeline: write the SVG directly
+        image_path = os.path.join(outdir, f'{safe_col}_distribution.svg')
+        write_distribution_svg(counts, column_name, image_path)
+        print(image_path)
+        return
+
+    import matplotlib
+    matplotlib.use("Agg")  # ensure headless-friendly backend
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10,6))  # Set the figure size
+    bars = ax.bar(counts.index.astype(str), counts.values,
+                  color=[f"C{i % 10}" for i in range(len(counts))])
+    ax.bar_label(bars, label_type='edge', color='black', size=10)
+    ax.set_xlabel(column_name)
+    ax.set_ylabel('count')
+    image_path = os.path.join(outdir, f'{safe_col}_distribution.png')
+    # zlib level 3 without the optimize pass: much faster to encode, nearly the same size for a bar chart
+    plt.savefig(image_path, dpi=150, bbox_inches='tight', pil_kwargs={'compress_level': 3, 'optimize': False})
+    plt.close()
+    print(image_path)
+
+# Main script execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Print the classes of a column and plot their distribution')
+    parser.add_argument('data_path', help='Path to the data file')
+    parser.add_argument('column_name', help='Name of the class column')
+    parser.add_argument('--format', dest='image_format', choices=['svg', 'png'], default='svg',
+                        help='Distribution chart format (default: svg)')
+    args = parser.parse_args()
+
+    # Get parameters
+    data_path = args.data_path
+    column_name = args.column_name
+
+    # Output directory
+    base_name = os.path.basename(data_path)
+    file_name_without_ext = os.path.splitext(base_name)[0]
+    outdir = os.path.join("results", file_name_without_ext)
+    
+    try:
+        counts = load_data(data_path, column_name, outdir)
+        visualize_diagnosis_distribution(counts, column_name, outdir, image_format=args.image_format)
+    except Exception as e:
+        logging.exception("Error while processing")
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
@@ -0,0 +1,199 @@
+import sys
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import json
+import orjson
+import uuid
+from datetime import datetime
+
+# Add modules directory to sys.path and import helper
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from modules.logger import logging
+
+
+def read_csv_table(path):
+    """Parse a CSV file into an Arrow table with pyarrow's multi-threaded reader.
+
+    Column names are made unique the way pandas does (``Unnamed: i`` for blank names,
+    ``.1``, ``.2``, ... for repeats). Files pyarrow rejects (e.g. ragged rows) are parsed
+    by pandas instead. A Parquet file (an earlier merge result) is read as is.
+    """
+    if path.lower().endswith('.parquet'):
+        return pq.read_table(path)
+    try:
+        table = pacsv.read_csv(path,
+                               read_options=pacsv.ReadOptions(use_threads=True, block_size=8 << 20),
+                               # Empty/NA cells in text columns are missing values, as in pandas
+                               convert_options=pacsv.ConvertOptions(strings_can_be_null=True))
+    except pa.ArrowInvalid:
+        return pa.Table.from_pandas(pd.read_csv(path, low_memory=False), preserve_index=False)
+
+    names = []
+    seen = {}
+    for i, name in enumerate(table.column_names):
+        if name == '':
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return table.rename_columns(names)
+
+
+def merge_files(chosen_columns, output_format='csv', dedupe_strategy='first'):
+    """Inner-join the chosen files on their sample columns and save the merged dataset.
+
+    Rows with a repeated sample ID are reduced to the first occurrence before joining
+    (``dedupe_strategy='first'``), since repeated keys multiply rows at every join;
+    ``dedupe_strategy='error'`` rejects such files instead.
+
+    The merged dataset is written as CSV by default: server.js recognises merged uploads
+    by their ``<id>_merged_dataset.csv`` name. ``output_format='parquet'`` writes
+    ``<id>_merged_dataset.parquet`` for callers that handle it.
+    """
+    dfs = []
+    column_metadata = {}
+
+    for info in chosen_columns:
+        path = info['filePath']
+        illness_col = info['illnessColumn']
+        sample_col = info['sampleColumn']
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+
+        table = read_csv_table(path)
+
+        # Ensure sample column exists
+        if sample_col not in table.column_names:
+            raise ValueError(f"Sample column '{sample_col}' not found in {path}")
+
+        # Track column origins and drop duplicates except for the join key:
+        # columns already seen in an earlier file are dropped, new ones remember this file
+        seen = set(column_metadata)
+        kept_columns = [col for col in table.column_names if col == sample_col or col not in seen]
+        column_metadata.update({col: path for col in kept_columns if col != sample_col})
+
+        # Full header of this input, recorded in the merge metadata
+        input_columns = table.column_names
+
+        # Duplicates are dropped on the Arrow table, so only kept columns are converted to pandas
+        df = table.select(kept_columns).to_pandas(self_destruct=True, split_blocks=True)
+
+        # Repeated sample IDs would multiply rows in every following join
+        dup_count = int(df[sample_col].duplicated().sum())
+        if dup_count:
+            if dedupe_strategy == 'error':
+                raise ValueError(f"Sample column '{sample_col}' has {dup_count} repeated IDs in {path}")
+            logging.warning(f"Dropping {dup_count} rows with repeated '{sample_col}' values in {path} (keeping the first)")
+            df = df.drop_duplicates(subset=[sample_col], keep='first')
+        dfs.append((df, sample_col, input_columns))
+
+    # Merge all dataframes using their sample column: each frame is indexed by its sample
+    # column once and inner-joined on the index (the sample columns collapse into the index)
+    first_df, key_col, _ = dfs[0]
+    key_position = first_df.columns.get_loc(key_col)
+    merged_df = first_df.set_index(key_col)
+
+    for df, sample_col, _ in dfs[1:]:
+        merged_df = merged_df.join(df.set_index(sample_col), how='inner', rsuffix='_dup')
+
+    # Restore the key column at its original position (joining indexes with different names
+    # drops the index name, so it is set again first)
+    merged_df.index.name = key_col
+    merged_df = merged_df.reset_index()
+    merged_df.insert(key_position, key_col, merged_df.pop(key_col))
+
+    # Rename the key column to a standardized name to avoid confusion
+    # This ensures the merged file always has "Sample ID" as the sample column
+    if key_col != "Sample ID":
+        merged_df.rename(columns={key_col: "Sample ID"}, inplace=True)
+        key_col = "Sample ID"
+
+    # Convert numeric columns to float for consistency (float64 columns already are, so only the
+    # int64 ones are cast, in one assignment)
+    int_cols = merged_df.select_dtypes(include=['int64']).columns
+    if len(int_cols):
+        merged_df[int_cols] = merged_df[int_cols].astype(float)
+
+    # Persist merged dataset into uploads directory with a fresh UUID prefix
+    uploads_dir = os.path.join('uploads')
+    os.makedirs(uploads_dir, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    merged_table = None
+    if output_format == 'parquet':
+        try:
+            merged_table = pa.Table.from_pandas(merged_df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type object columns cannot be stored in Parquet; keep the CSV output
+            merged_table = None
+    if merged_table is not None:
+        # Parquet: downstream loads skip text parsing entirely
+        merged_filename = f"{upload_id}_merged_dataset.parquet"
+        merged_file_path = os.path.join(uploads_dir, merged_filename)
+        pq.write_table(merged_table, merged_file_path, compression='zstd', row_group_size=64000)
+    else:
+        merged_filename = f"{upload_id}_merged_dataset.csv"
+        merged_file_path = os.path.join(uploads_dir, merged_filename)
+        # pandas writes floats with their decimal point (1.0, not 1 as Arrow's CSV writer does),
+        # so the columns cast to float above read back as float
+        merged_df.to_csv(merged_file_path, index=False)
+
+    # Save enhanced metadata alongside other results for traceability
+    metadata_dir = os.path.join('results', 'merged_files')
+    os.makedirs(metadata_dir, exist_ok=True)
+    metadata = {
+        "merged_id": upload_id,
+        "timestamp": datetime.now().isoformat(),
+        "merge_type": "inner",
+        "unified_sample_column": key_col,  # Always "Sample ID" after standardization
+        "input_files": {},
+        "merged_file": merged_file_path,
+        "merged_columns": merged_df.columns.tolist(),
+        "size_bytes": os.path.getsize(merged_file_path)
+    }
+
+    # Input headers were captured when each file was read, so no file is opened again here
+    for info, (_, _, df_cols) in zip(chosen_columns, dfs):
+        path = info['filePath']
+        illness_col = info['illnessColumn']
+        sample_col = info['sampleColumn']
+        basename = os.path.basename(path)
+        clean_name = basename.split('_', 1)[1] if '_' in basename else basename
+
+        metadata["input_files"][clean_name] = {
+            "illness_column": illness_col,
+            "sample_column": sample_col,
+            "columns": df_cols
+        }
+
+    metadata_path = os.path.join(metadata_dir, f"{upload_id}_metadata.json")
+    with open(metadata_path, "wb") as f:
+        f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+
+    return {
+        'mergedFilePath': merged_file_path,
+        'metadataPath': metadata_path,
+        'columns': merged_df.columns.tolist(),
+        'uploadId': upload_id,
+        'mergedFileName': merged_filename,
+        'sizeBytes': metadata['size_bytes'],
+        'unifiedSampleColumn': key_col  # Always "Sample ID"
+    }
+
+if __name__ == "__main__":
+    chosen_columns = json.loads(sys.argv[1])
+    # Optional second argument: 'parquet' opts into the Parquet output (default 'csv')
+    output_format = sys.argv[2].lower() if len(sys.argv) > 2 else 'csv'
+    try:
+        result = merge_files(chosen_columns, output_format=output_format)
+        print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+    except Exception as e:
+        sys.stderr.write(str(e))
+        sys.exit(1)
+
@@ -0,0 +1,292 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import orjson
+import pandas as pd
+
+DEFAULT_GENE_SET = "KEGG_2021_Human"
+DEFAULT_ORGANISM = "Human"
+SIGNIFICANCE_THRESHOLD = 0.05
+ENRICHR_RETRIES = 3            # Attempts per Enrichr request, with exponential backoff
+
+_run_id_lock = threading.Lock()
+_last_run_id = 0
+
+
+def new_run_id() -> str:
+    # Nanosecond timestamp in hex, bumped when needed so ids stay unique and increasing
+    # within the process
+    global _last_run_id
+    with _run_id_lock:
+        _last_run_id = max(time.time_ns(), _last_run_id + 1)
+        return f"{_last_run_id:x}"
+
+
+def sanitize_label_for_path(label: str) -> str:
+    if not label:
+        return "kegg_pathway_analysis_results"
+    safe = label.strip().lower().replace(" ", "_")
+    return safe or "kegg_pathway_analysis_results"
+
+
+def results_root_directory(base_dir: str) -> str:
+    return os.path.abspath(base_dir) if base_dir else os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "results")
+    )
+
+
+def enrichment_cache_path(base_dir: str, genes: List[str], gene_set: str, organism: str) -> str:
+    # Enrichr results only depend on the gene set, the organism and the (unordered) genes
+    key = hashlib.sha1(
+        ("\n".join(sorted(genes)) + "|" + gene_set + "|" + organism).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(results_root_directory(base_dir), "pathway_analysis", "_cache", f"{key}.parquet")
+
+
+def run_enrichr(genes: List[str], gene_set: str, organism: str) -> pd.DataFrame:
+    # gseapy pulls in requests, scipy and matplotlib, so it is only imported when a query runs
+    import requests
+    from gseapy import enrichr
+
+    # Retry (1 s, 2 s, ...) only on network errors and timeouts; other errors (bad gene set,
+    # invalid response) would fail again and are raised right away
+    for attempt in range(ENRICHR_RETRIES):
+        try:
+            enrichment = enrichr(gene_list=genes, gene_sets=gene_set, organism=organism)
+            return getattr(enrichment, "results", pd.DataFrame())
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutError):
+            if attempt == ENRICHR_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def ensure_output_directory(base_dir: str, class_pair: str, analysis_label: str) -> str:
+    output_dir = os.path.join(results_root_directory(base_dir), "pathway_analysis")
+    if class_pair:
+        output_dir = os.path.join(output_dir, class_pair)
+    safe_label = sanitize_label_for_path(analysis_label)
+    output_dir = os.path.join(output_dir, safe_label)
+    os.makedirs(output_dir, exist_ok=True)
+    # Remove earlier result files to have one kegg_pathway_analysis_results file per run
+    # (only files named like ours are touched; this code never creates subdirectories here)
+    for entry in Path(output_dir).glob(f"{safe_label}_*.csv"):
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+    return output_dir
+
+
+def perform_enrichment_analysis(
+    analysis_results: List[str],
+    results_dir: str,
+    class_pair: str = "",
+    gene_set: str = DEFAULT_GENE_SET,
+    analysis_label: str = "KEGG pathway analysis",
+    analysis_display_name: str = "KEGG pathway analysis",
+    organism: str = DEFAULT_ORGANISM,
+):
+    try:
+        sanitized = [gene.strip() for gene in analysis_results if isinstance(gene, str) and gene.strip()]
+        if not sanitized:
+            summary = "No significant genes found in the analysis results."
+            return {
+                "success": False,
+                "message": summary,
+                "error": "No significant genes available for analysis.",
+                "data": {
+                    "pathwayResults": None,
+                    "summary": summary,
+                    "significantPathwayCount": 0,
+                    "totalPathways": 0,
+                    "inputGeneCount": 0,
+                    "classPair": class_pair or None,
+                    "analysisLabel": analysis_label,
+                    "analysisDisplayName": analysis_display_name,
+                    "geneSet": gene_set,
+                },
+            }
+
+        # Identical gene lists (e.g. across class pairs) reuse the stored Enrichr response
+        cache_path = enrichment_cache_path(results_dir, sanitized, gene_set or DEFAULT_GENE_SET, organism)
+        results = None
+        if os.path.exists(cache_path):
+            try:
+                results = pd.read_parquet(cache_path)
+            except Exception:
+                results = None
+        if results is None:
+            results = run_enrichr(sanitized, gene_set or DEFAULT_GENE_SET, organism)
+            # Empty responses are not stored: they can come from a temporary Enrichr problem,
+            # and a cached copy would be returned for these genes from then on
+            if not results.empty:
+                try:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    results.to_parquet(cache_path, index=False)
+                except Exception:
+                    pass
+
+        run_id = new_run_id()
+
+        if results.empty:
+            # An empty result table is still written: routes/pathwayAnalysis.js only records
+            # the run in the analysis history when pathwayResults is set
+            summary = f"No {analysis_display_name} pathways were returned for the provided genes."
+            output_dir = ensure_output_directory(results_dir, class_pair, analysis_label)
+            output_path = os.path.join(
+                output_dir,
+                f"{sanitize_label_for_path(analysis_label)}_{run_id}.csv",
+            )
+            results.to_csv(output_path, index=False)
+            return {
+                "success": True,
+                "message": summary,
+                "data": {
+                    "pathwayResults": output_path,
+                    "summary": summary,
+                    "significantPathwayCount": 0,
+                    "totalPathways": 0,
+                    "inputGeneCount": len(sanitized),
+                    "classPair": class_pair or None,
+                    "runId": run_id,
+                    "analysisLabel": analysis_label,
+                    "analysisDisplayName": analysis_display_name,
+                    "geneSet": gene_set,
+                },
+            }
+
+        if "Adjusted P-value" in results.columns:
+            # Only the exported rows are sorted: the significant ones, or every pathway when
+            # none passes the threshold
+            significant_mask = results["Adjusted P-value"] < SIGNIFICANCE_THRESHOLD
+            significant_pathways = results[significant_mask].sort_values(by="Adjusted P-value", ascending=True)
+            if significant_pathways.empty:
+                results = results.sort_values(by="Adjusted P-value", ascending=True)
+        else:
+            significant_pathways = pd.DataFrame()
+
+        output_dir = ensure_output_directory(results_dir, class_pair, analysis_label)
+        output_path = os.path.join(
+            output_dir,
+            f"{sanitize_label_for_path(analysis_label)}_{run_id}.csv",
+        )
+
+        export_frame = significant_pathways if not significant_pathways.empty else results
+        export_frame.to_csv(output_path, index=False)
+
+        significant_count = int(significant_pathways.shape[0]) if not significant_pathways.empty else 0
+        total_count = int(results.shape[0])
+        summary = (
+            f"{analysis_display_name} completed: {significant_count} of {total_count} pathways "
+            f"passed the significance threshold ({SIGNIFICANCE_THRESHOLD})."
+        )
+
+        return {
+            "success": True,
+            "message": summary,
+            "data": {
+                "pathwayResults": output_path,
+                "summary": summary,
+                "significantPathwayCount": significant_count,
+                "totalPathways": total_count,
+                "inputGeneCount": len(sanitized),
+                "classPair": class_pair or None,
+                "runId": run_id,
+                "analysisLabel": analysis_label,
+                "analysisDisplayName": analysis_display_name,
+                "geneSet": gene_set,
+            },
+        }
+    except Exception as exc:
+        summary = f"{analysis_display_name} failed due to an error."
+        return {
+            "success": False,
+            "message": summary,
+            "error": str(exc),
+            "data": {
+                "pathwayResults": None,
+                "summary": summary,
+                "significantPathwayCount": 0,
+                "totalPathways": 0,
+                "inputGeneCount": len(analysis_results) if analysis_results else 0,
+                "classPair": class_pair or None,
+                "runId": None,
+                "analysisLabel": analysis_label,
+                "analysisDisplayName": analysis_display_name,
+                "geneSet": gene_set,
+            },
+        }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        failure_payload = {
+            "success": False,
+            "message": "Pathway analysis input file was not provided.",
+            "error": "Usage: python pathway_analysis.py <analysis_results.json> [results_dir] [class_pair] [gene_set] [analysis_label] [analysis_display_name]",
+            "data": {
+                "pathwayResults": None,
+                "summary": "Missing input parameters prevented execution.",
+                "significantPathwayCount": 0,
+                "totalPathways": 0,
+                "inputGeneCount": 0,
+                "classPair": None,
+            },
+        }
+        print(orjson.dumps(failure_payload).decode())
+        sys.exit(1)
+
+    gene_list_path = sys.argv[1]
+    provided_results_dir = sys.argv[2] if len(sys.argv) >= 3 else os.path.join(os.path.dirname(__file__), "..", "results")
+    provided_class_pair = sys.argv[3] if len(sys.argv) >= 4 else ""
+    provided_gene_set = sys.argv[4] if len(sys.argv) >= 5 else DEFAULT_GENE_SET
+    provided_analysis_label = sys.argv[5] if len(sys.argv) >= 6 else "KEGG pathway analysis"
+    provided_analysis_display = sys.argv[6] if len(sys.argv) >= 7 else provided_analysis_label
+
+    try:
+        with open(gene_list_path, "rb") as handle:
+            raw_payload = orjson.loads(handle.read())
+
+        if isinstance(raw_payload, dict):
+            candidate = raw_payload.get("analysisResults") or raw_payload.get("genes")
+            analysis_results = candidate if isinstance(candidate, list) else []
+        elif isinstance(raw_payload, list):
+            analysis_results = raw_payload
+        else:
+            analysis_results = []
+
+        result = perform_enrichment_analysis(
+            analysis_results,
+            provided_results_dir,
+            provided_class_pair,
+            gene_set=provided_gene_set,
+            analysis_label=provided_analysis_label,
+            analysis_display_name=provided_analysis_display,
+        )
+        print(orjson.dumps(result).decode())
+
+        if not result.get("success", False):
+            sys.exit(1)
+    except Exception as exc:
+        failure_payload = {
+            "success": False,
+            "message": f"{provided_analysis_label} failed to start.",
+            "error": str(exc),
+            "data": {
+                "pathwayResults": None,
+                "summary": "Unable to load or parse the input genes.",
+                "significantPathwayCount": 0,
+                "totalPathways": 0,
+                "inputGeneCount": 0,
+                "classPair": provided_class_pair or None,
+                "analysisLabel": provided_analysis_label,
+                "analysisDisplayName": provided_analysis_display,
+                "geneSet": provided_gene_set,
+            },
+        }
+        print(orjson.dumps(failure_payload).decode())
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,356 @@
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless: figures are only written to files
+import matplotlib.pyplot as plt
+import sys
+import os
+import re
+import json
+import shutil
+import hashlib
+
+# Files written for each output format argument; only the requested ones are rendered
+OUTPUT_FORMATS = {'png': ('png',), 'pdf': ('pdf',), 'both': ('png', 'pdf')}
+
+# Rendered plots kept per analysis for repeat requests (least recently used entries are dropped)
+RENDER_CACHE_MAX_ENTRIES = 32
+
+# Map short aggregation method codes to human-readable names
+_METHOD_NAME_MAP = {
+    'rrf': 'Reciprocal Rank Fusion',
+    'rank_product': 'Rank Product',
+    'weighted_borda': 'Weighted Borda Count',
+    'sum': 'Simple Sum',
+}
+_METHOD_PART_RE = re.compile(r"^method\s*=\s*(.+)$", re.IGNORECASE)
+_UNSAFE_LABEL_CHARS = re.compile(r'[^A-Za-z0-9._=+\-]+')
+
+def _humanize_agg_label(label: str) -> str:
+    """Convert an aggregation label into a human-readable form.
+
+    Expected formats coming from the server:
+      - "method=rrf,k=60"
+      - "method=weighted_borda,weights={...}"
+    Also be robust to legacy/short forms like just "rrf".
+    """
+    if not label:
+        return ""
+
+    s = str(label).strip()
+    low = s.lower()
+
+    # If it's just the bare method token, expand directly
+    if low in _METHOD_NAME_MAP:
+        return _METHOD_NAME_MAP[low]
+
+    # Otherwise parse comma-separated key=value pairs, replacing method value
+    # (stripping after a plain split matches splitting on r"\s*,\s*")
+    parts = [p.strip() for p in s.split(',') if p.strip()]
+
+    out_parts = []
+    method_seen = False
+    for p in parts:
+        m = _METHOD_PART_RE.match(p)
+        if m:
+            method_seen = True
+            val = m.group(1).strip().lower()
+            readable = _METHOD_NAME_MAP.get(val, m.group(1).strip())
+            # Prefer to show method name alone (without the "method=" prefix)
+            out_parts.append(readable)
+        else:
+            out_parts.append(p)
+
+    # If no explicit method= was present but the string starts with a known token, expand best-effort
+    if not method_seen:
+        maybe = parts[0].lower()
+        if maybe in _METHOD_NAME_MAP:
+            parts[0] = _METHOD_NAME_MAP[maybe]
+            return ", ".join([parts[0]] + parts[1:])
+
+    return ", ".join(out_parts)
+
+# Read the CSV file (feature ranking CSVs are written with ';' separator)
+def _parse_ranked_csv(path, engine='pyarrow'):
+    try:
+        _df = pd.read_csv(path, sep=';', engine=engine)
+        if _df.shape[1] <= 1:
+            _df = pd.read_csv(path, engine=engine)
+        return _df
+    except Exception:
+        if engine == 'pyarrow':
+            # Arrow's multi-threaded parser goes first; the C parser handles anything it rejects
+            return _parse_ranked_csv(path, engine='c')
+        return pd.read_csv(path)
+
+def _read_ranked_csv(path):
+    # Re-renders of the same ranking load a parquet copy kept next to the CSV;
+    # it is refreshed whenever the CSV is newer (e.g. after re-aggregation)
+    cache_path = path + ".parquet"
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            return pd.read_parquet(cache_path)
+    except Exception:
+        pass
+    _df = _parse_ranked_csv(path)
+    try:
+        _df.to_parquet(cache_path, index=False)
+    except Exception:
+        pass  # Caching is best-effort
+    return _df
+
+def _render_cache_key(ranked_features_path, feature_count, class_pair, agg_label):
+    # The plot depends only on the ranking file contents and the render parameters
+    digest = hashlib.blake2b(digest_size=16)
+    with open(ranked_features_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(repr((feature_count, class_pair, agg_label)).encode())
+    return digest.hexdigest()
+
+def _restore_cached_render(cache_dir, output_paths):
+    cached = [os.path.join(cache_dir, os.path.basename(path)) for path in output_paths]
+    if not all(os.path.exists(path) for path in cached):
+        return False
+    for src, dst in zip(cached, output_paths):
+        shutil.copyfile(src, dst)
+    os.utime(cache_dir)  # Mark as recently used
+    return True
+
+def _store_cached_render(cache_dir, output_paths):
+    os.makedirs(cache_dir, exist_ok=True)
+    for path in output_paths:
+        shutil.copyfile(path, os.path.join(cache_dir, os.path.basename(path)))
+    cache_root = os.path.dirname(cache_dir)
+    entries = sorted((e for e in os.scandir(cache_root) if e.is_dir()), key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in entries[RENDER_CACHE_MAX_ENTRIES:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+# Custom annotation function for heatmap
+# Annotates each cell with integer value, light text on dark cells and dark text on light ones
+
+def annotate_heatmap(ax, data, im, fontsize=20):
+    rgb = im.cmap(im.norm(data))[..., :3]
+    rgb = np.where(rgb <= .03928, rgb / 12.92, ((rgb + .055) / 1.055) ** 2.4)
+    text_colors = np.where(rgb @ np.array([.2126, .7152, .0722]) > .408, ".15", "w")
+    # Format every cell as an integer in one pass; missing ranks stay blank
+    missing = np.isnan(data)
+    texts = np.char.mod("%d", np.where(missing, 0, data).astype(np.int64))
+    for i, j in zip(*np.nonzero(~missing)):
+        ax.text(j, i, texts[i, j], ha="center", va="center", fontsize=fontsize, color=text_colors[i, j])
+
+def render(data_path, feature_count=20, class_pair=None, csv_path=None, agg_label="", output_format="both"):
+    """Draw the summary heatmap for one ranking and return the PNG path (the PDF path for "pdf" only)."""
+    feature_count = int(feature_count)  # Number of miRNAs to display
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {list(OUTPUT_FORMATS)}, got {output_format!r}")
+
+    # Extract analysis name from data_path (remove 'uploads/' and .csv extension)
+    # Example: "uploads/GSE120584_serum_norm.csv" -> "GSE120584_serum_norm"
+    file_name = os.path.basename(data_path).split('.')[0]
+
+    # Use custom csv_path if specified, otherwise choose a sensible default
+    if csv_path:
+        # Use custom CSV file
+        ranked_features_path = csv_path
+    else:
+        # Prefer the canonical per-class-pair location when class_pair is provided
+        if class_pair:
+            ranked_features_path = os.path.join("results", file_name, "feature_ranking", class_pair, "ranked_features_df.csv")
+            # Fallback to legacy location if not found later during read
+        else:
+            # Legacy fallback (no class_pair specified)
+            ranked_features_path = os.path.join("results", file_name, "ranked_features_df.csv")
+
+    if not os.path.exists(ranked_features_path):
+        # Final fallback: try legacy path if class_pair default was missing
+        ranked_features_path = os.path.join("results", file_name, "ranked_features_df.csv")
+
+    # Output directory (labeled per aggregation if provided)
+    if class_pair:
+        outdir = os.path.join("results", file_name, "summaryStatisticalMethods", class_pair)
+    else:
+        outdir = os.path.join("results", file_name, "summaryStatisticalMethods")
+
+    if agg_label:
+        safe_label = _UNSAFE_LABEL_CHARS.sub('_', agg_label)
+        outdir = os.path.join(outdir, safe_label)
+
+    # Create folders if they do not exist
+    output_paths = []
+    for fmt in OUTPUT_FORMATS[output_format]:
+        os.makedirs(os.path.join(outdir, fmt), exist_ok=True)
+        output_paths.append(os.path.join(outdir, fmt, f"summary_of_statistical_methods_plot.{fmt}"))
+
+    # Identical requests reuse earlier output without parsing or drawing anything
+    cache_dir = None
+    try:
+        cache_key = _render_cache_key(ranked_features_path, feature_count, class_pair, agg_label)
+        cache_dir = os.path.join("results", file_name, "summaryStatisticalMethods", "_cache", cache_key)
+        if _restore_cached_render(cache_dir, output_paths):
+            return output_paths[0]
+    except Exception:
+        pass  # Fall through to a normal render
+
+    df = _read_ranked_csv(ranked_features_path)
+
+    # Some ranked CSVs may not include this column; ignore if missing
+    df.drop(columns=["overall score"], inplace=True, errors="ignore")
+
+    # Calculate mean rank robustly (coerce non-numeric, tolerate missing values)
+    # Rank columns are normally numeric already: cast them in one go, coercing column by column
+    # only when something non-numeric is present (float32 is exact for rank values)
+    rank_part = df.iloc[:, 1:]
+    try:
+        numeric_part = rank_part.astype(np.float32)
+    except (TypeError, ValueError):
+        numeric_part = rank_part.apply(pd.to_numeric, errors='coerce', downcast='float')
+    mean_rank = numeric_part.mean(axis=1, skipna=True)
+    global_max = numeric_part.max().max()
+    if pd.isna(global_max):
+        global_max = 1e9  # fallback if all values are NaN
+    # Fill NaNs with a large value to push them to the bottom, then round and cast
+    df["Mean Rank"] = mean_rank.fillna(global_max + 1000).round().astype(np.int32)
+
+    # Select and sort the top N (feature_count) biomarkers with the smallest (most effective) mean rank
+    # Partial selection instead of a full sort: only rows tied with the feature_count-th
+    # smallest rank or better are sorted (stably, so ties keep file order like nsmallest)
+    ranks = df["Mean Rank"].to_numpy()
+    if 0 < feature_count < len(ranks):
+        cutoff = np.partition(ranks, feature_count - 1)[feature_count - 1]
+        candidates = np.flatnonzero(ranks <= cutoff)
+        top_idx = candidates[np.argsort(ranks[candidates], kind="stable")[:feature_count]]
+    else:
+        top_idx = np.argsort(ranks, kind="stable")[:max(feature_count, 0)]
+    df_top = df.iloc[top_idx]
+
+    # Visualization settings - adjust for larger size
+    column_count = df.shape[1] - 1
+    # Set minimum width to 12 inches and scale by number of columns
+    min_width = max(12, column_count * 1.5)  
+    # Increase height, especially for more rows
+    height = min(15, feature_count/3 + 5)  
+    plt.figure(figsize=(min_width, height))
+
+    # Find the appropriate feature column name (feature type)
+    feature_column = df_top.columns[0]  # First column is feature type (microRNA, gene, etc)
+
+    # Use a more readable and high-contrast color palette ("magma")
+    # Drawn as one image rather than seaborn's per-cell mesh, which keeps the dpi=400 PNG fast
+    # to rasterize and the PDF small
+    heatmap_df = df_top.set_index(feature_column)
+    values = heatmap_df.to_numpy(dtype=float)
+    if np.nanmax(np.abs(values), initial=0) < 2 ** 24:
+        values = values.astype(np.float32)  # Exact for ranks; halves the colormap work
+    ax = plt.gca()
+    im = ax.imshow(
+        values,
+        cmap="magma_r",  # Reversed magma colormap for dark background, light text
+        aspect="auto",  # Use rectangular cells
+        interpolation="none"
+    )
+    plt.colorbar(im, ax=ax)
+    ax.set_xticks(np.arange(values.shape[1]))
+    ax.set_xticklabels(heatmap_df.columns)
+    ax.set_yticks(np.arange(values.shape[0]))
+    ax.set_yticklabels(heatmap_df.index)
+    # Gray lines between cells
+    ax.set_xticks(np.arange(values.shape[1] + 1) - 0.5, minor=True)
+    ax.set_yticks(np.arange(values.shape[0] + 1) - 0.5, minor=True)
+    ax.grid(which="minor", color="gray", linewidth=0.7)
+    ax.tick_params(which="minor", length=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    # Cell labels are created once, with their final integer text, right alongside the image
+    annotate_heatmap(ax, values, im)
+
+    # Adjust title font size based on length
+    # Use a more generic heading and include aggregation label for clarity
+    if class_pair:
+        # Replace underscores with ' vs ' for display purposes
+        class_pair_display = class_pair.replace('_', ' vs ')
+        human_label = _humanize_agg_label(agg_label)
+        agg_suffix = f" (Aggregation: {human_label})" if human_label else ""
+        title_text = (
+            f"Top {feature_count} Biomarkers and Their Rankings by Statistical Methods\n"
+            f"for Class Pair: {class_pair_display}{agg_suffix}"
+        )
+    else:
+        human_label = _humanize_agg_label(agg_label)
+        agg_suffix = f" (Aggregation: {human_label})" if human_label else ""
+        title_text = f"Top {feature_count} Biomarkers and Their Rankings by Statistical Methods{agg_suffix}"
+
+    # Set font size
+    fontsize = 20 if column_count >= 5 else 18
+
+    # Set title and labels with larger font size
+    plt.title(title_text, fontsize=fontsize, fontweight="bold", pad=20)
+    plt.xticks(rotation=45, ha="right", fontsize=18)
+    plt.yticks(rotation=0, fontsize=18)
+    plt.xlabel("Statistical Methods", fontsize=24)
+    plt.ylabel(feature_column, fontsize=24)
+
+    # Expand and adjust plot area (savefig's bbox_inches='tight' trims the margins, so no
+    # tight_layout pass is needed on top of this)
+    plt.subplots_adjust(top=0.92, bottom=0.15, left=0.20, right=0.95)
+
+    fig = plt.gcf()
+    for path in output_paths:
+        if path.endswith(".png"):
+            # Save files with higher resolution
+            fig.savefig(path, dpi=400, bbox_inches='tight')
+        else:
+            # Save as PDF (vector output, so no dpi is needed; the heatmap image is embedded as-is)
+            fig.savefig(path, bbox_inches='tight')
+    plt.close(fig)
+
+    if cache_dir:
+        try:
+            _store_cached_render(cache_dir, output_paths)
+        except Exception:
+            pass  # Caching is best-effort
+    return output_paths[0]
+
+
+def serve():
+    """Render requests read from stdin, one JSON object per line, until stdin closes.
+
+    Keeps numpy/pandas/matplotlib imported and the font cache warm across plots instead of
+    paying for them in a new process per render. Each request holds render()'s keyword
+    arguments; each reply is one JSON line with either "path" (the first file render() wrote,
+    PNG unless output_format is "pdf") or "error". Replies used a "png" key before render()
+    could write PDF-only output; it was renamed to "path" then.
+    """
+    # Do the font lookup and first-draw setup once, before the first request arrives
+    warmup = plt.figure()
+    warmup.add_subplot().text(0, 0, '0')
+    warmup.canvas.draw()
+    plt.close(warmup)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            reply = {"path": render(**json.loads(line))}
+        except Exception as e:
+            plt.close('all')
+            reply = {"error": str(e)}
+        print(json.dumps(reply), flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2 and sys.argv[1] == '--serve':
+        serve()
+    else:
+        # Get parameters from command line
+        data_path = sys.argv[1]  # File path
+        feature_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20  # Number of miRNAs to display
+
+        # Optional class pair, csv path, and aggregation label parameters
+        class_pair = sys.argv[3] if len(sys.argv) > 3 else None  # Class pair (optional)
+        csv_path = sys.argv[4] if len(sys.argv) > 4 else None  # CSV file path (optional)
+        agg_label = sys.argv[5] if len(sys.argv) > 5 else ""  # Aggregation label (optional)
+        output_format = sys.argv[6] if len(sys.argv) > 6 else "both"  # png, pdf or both (optional)
+
+        # Print relative path (to be used by server.js)
+        print(render(data_path, feature_count, class_pair, csv_path, agg_label, output_format))
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+pd = pytest.importorskip("pandas")
+analyze = pytest.importorskip("services.analyze")
+
+
+def test_match_class_labels_plain_list_and_delimited_cells():
+    labels = pd.Series(["A", " B ", "['A', 'C']", "C;A", "C|D", None, "A/B"])
+    mask = analyze.match_class_labels(labels, ["A"])
+    assert mask.tolist() == [True, False, True, True, False, False, True]
+
+
+def test_match_class_labels_rejects_unparsed_bracket_tokens():
+    # Unquoted bracketed cells are not parsed as lists, so the class token inside does not match
+    labels = pd.Series(["[A", "[A]", "[A, B]", "[B, A]", "A, B"])
+    mask = analyze.match_class_labels(labels, ["A"])
+    assert mask.tolist() == [False, False, False, False, True]
+
+
+def test_match_class_labels_compares_numbers_numerically():
+    labels = pd.Series([1.0, 2.0, "1.0;3", "['2', '3']", "3"])
+    mask = analyze.match_class_labels(labels, ["1"])
+    assert mask.tolist() == [True, False, True, False, False]
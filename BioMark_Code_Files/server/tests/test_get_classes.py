@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+pytest.importorskip("pyarrow")
+get_classes = pytest.importorskip("services.get_classes")
+
+
+def test_count_values_arrow_skips_empty_class_cells(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("id,diagnosis\ns1,AD\ns2,\ns3,Control\ns4,AD\ns5,NA\n")
+    values, counts = get_classes.count_values_arrow(str(path), "diagnosis")
+    assert values == ["AD", "Control"]
+    assert counts == [2, 1]
+
+
+def test_count_values_arrow_widens_integer_classes_with_missing_cells(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("id,label\ns1,1\ns2,\ns3,0\ns4,1\n")
+    values, counts = get_classes.count_values_arrow(str(path), "label")
+    assert values == [1.0, 0.0]
+    assert counts == [2, 1]
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+merge = pytest.importorskip("services.merge")
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_merged_csv_keeps_integer_columns_as_float(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = _write(tmp_path / "a.csv", "id,diagnosis,g1\ns1,AD,1\ns2,Control,2\n")
+    second = _write(tmp_path / "b.csv", "sample,g2\ns1,3.5\ns2,4.5\n")
+    result = merge.merge_files([
+        {"filePath": first, "illnessColumn": "diagnosis", "sampleColumn": "id"},
+        {"filePath": second, "illnessColumn": "", "sampleColumn": "sample"},
+    ])
+
+    merged = pd.read_csv(result["mergedFilePath"])
+    assert list(merged.columns) == ["Sample ID", "diagnosis", "g1", "g2"]
+    assert merged["g1"].dtype == "float64"
+    assert merged["g1"].tolist() == [1.0, 2.0]
+
+
+
+def test_read_csv_table_reads_empty_text_cells_as_missing(tmp_path):
+    path = _write(tmp_path / "a.csv", "id,diagnosis,,id\ns1,,1,x\ns2,AD,2,y\n")
+    table = merge.read_csv_table(path)
+    assert table.column_names == ["id", "diagnosis", "Unnamed: 2", "id.1"]
+    assert table.column("diagnosis").to_pylist() == [None, "AD"]
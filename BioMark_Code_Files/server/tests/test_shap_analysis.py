@@ -0,0 +1,90 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+shap = pytest.importorskip("shap")
+shap_analysis = pytest.importorskip("modules.modelExplanation.shap_analysis")
+
+
+def _analysis_with_values(values, class_names=None):
+    # Only the state _slice() reads; fit() needs a trained model and data
+    analysis = shap_analysis.SHAP_Analysis.__new__(shap_analysis.SHAP_Analysis)
+    analysis.shap_values = shap.Explanation(
+        values=values,
+        base_values=np.zeros(values.shape[:1] + values.shape[2:]),
+        data=np.random.default_rng(1).random(values.shape[:2]),
+    )
+    analysis._class_to_idx = {name: i for i, name in enumerate(class_names or [])}
+    analysis._is_multiclass = values.ndim > 2 and values.shape[2] > 1
+    return analysis
+
+
+def test_slice_single_sample_is_one_dimensional():
+    analysis = _analysis_with_values(np.random.default_rng(0).random((60, 13)))
+    explanation = analysis._slice(3)
+    assert isinstance(explanation.values, np.ndarray)
+    assert explanation.values.shape == (13,)
+
+
+def test_slice_single_sample_of_one_class_is_one_dimensional():
+    analysis = _analysis_with_values(np.random.default_rng(0).random((60, 13, 3)), ["A", "B", "C"])
+    assert analysis._slice(3, "B").values.shape == (13,)
+
+
+def _analysis_with_model(model, X):
+    # Only the state _compute_shap_values() reads
+    analysis = shap_analysis.SHAP_Analysis.__new__(shap_analysis.SHAP_Analysis)
+    analysis.fitted_model = model
+    analysis.background_size = 20
+    analysis._X_processed_np = np.ascontiguousarray(X, dtype=np.float32)
+    return analysis
+
+
+def test_multiclass_gradient_boosting_falls_back_to_model_agnostic_explainer():
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.random((45, 4))
+    y = np.repeat([0, 1, 2], 15)
+    model = GradientBoostingClassifier(n_estimators=5, random_state=0).fit(X, y)
+    analysis = _analysis_with_model(model, X)
+
+    explain_idx = np.arange(5)
+    values = analysis._compute_shap_values(X[explain_idx], explain_idx, "GradientBoosting")
+    assert values.values.shape == (5, 4, 3)
+
+
+def test_random_forest_uses_tree_explainer():
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.random((40, 4))
+    y = np.repeat([0, 1], 20)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    analysis = _analysis_with_model(model, X)
+    analysis._model_agnostic_shap_values = lambda *args: pytest.fail("model-agnostic explainer was used")
+
+    explain_idx = np.arange(5)
+    values = analysis._compute_shap_values(X[explain_idx], explain_idx, "RandomForest")
+    assert values.values.shape[:2] == (5, 4)
+
+
+def test_memmapped_values_slice_and_are_not_rewritten(tmp_path):
+    values = np.random.default_rng(0).random((60, 13, 3)).astype(np.float32)
+    analysis = _analysis_with_values(values, ["A", "B", "C"])
+    values_path = str(tmp_path / "cache" / "key.values.npy")
+
+    analysis._memmap_shap_values(values_path)
+    assert type(analysis.shap_values.values) is np.ndarray
+    np.testing.assert_array_equal(analysis.shap_values.values, values)
+    assert analysis._slice(3, "B").values.shape == (13,)
+
+    # A cache hit with the same shape and dtype maps the existing file instead of writing it again
+    mtime = os.stat(values_path).st_mtime_ns
+    analysis = _analysis_with_values(values, ["A", "B", "C"])
+    analysis._memmap_shap_values(values_path)
+    assert os.stat(values_path).st_mtime_ns == mtime
+    assert not analysis.shap_values.values.flags.writeable
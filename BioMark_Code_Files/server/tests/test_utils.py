@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sklearn = pytest.importorskip("sklearn")
+utils = pytest.importorskip("modules.utils")
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, HalvingRandomSearchCV, StratifiedKFold
+
+
+def _two_class_data(n_samples):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(n_samples, 4))
+    y = np.arange(n_samples) % 2
+    return X, y
+
+
+def test_make_search_small_training_set_uses_grid_search(monkeypatch):
+    monkeypatch.delenv("SEARCH", raising=False)
+    # Halving needs 2 * 5 splits * 2 classes = 20 samples; 16 must fall back to the grid search
+    X, y = _two_class_data(16)
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    search = utils.make_search(LogisticRegression(), {"C": [0.1, 1.0]}, cv=cv, scoring="accuracy", n_jobs=1, y=y)
+    assert isinstance(search, GridSearchCV)
+    search.fit(X, y)
+    assert search.best_params_["C"] in (0.1, 1.0)
+
+
+def test_make_search_large_training_set_uses_halving(monkeypatch):
+    monkeypatch.delenv("SEARCH", raising=False)
+    X, y = _two_class_data(60)
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    search = utils.make_search(LogisticRegression(), {"C": [0.1, 1.0]}, cv=cv, scoring="accuracy", n_jobs=1, y=y)
+    assert isinstance(search, HalvingRandomSearchCV)
+    search.fit(X, y)
+
+
+def test_load_table_names_blank_and_repeated_columns_like_pandas(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "table.csv"
+    path.write_text("id,,value,value\ns1,1,2.5,3\ns2,4,5.5,6\n")
+    df = utils.load_table(str(path))
+    assert list(df.columns) == ["id", "Unnamed: 1", "value", "value.1"]
+    assert df["value"].tolist() == [2.5, 5.5]